@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from apps.cart.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete expired Idempotency-Key records."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Purged {purge_expired()} expired idempotency keys")
@@ -1,4 +1,6 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 from decimal import Decimal
 
 class Cart(models.Model):
@@ -48,4 +50,31 @@ class CartItem(models.Model):
     @property
     def subtotal(self):
         """Subtotal for the cart item."""
-        return self.price * self.quantity
\ No newline at end of file
+        return self.price * self.quantity
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response stored for a client's Idempotency-Key, replayed to retries
+    until it expires. `status_code` is empty while the request runs, and
+    `expires_at` is then the end of that request's lease.
+    """
+
+    user_id = models.IntegerField()
+    key = models.CharField(max_length=100)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    claimed_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user_id", "key"], name="idempotency_user_key_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="idempotency_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.user_id})"
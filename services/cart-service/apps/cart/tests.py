@@ -1,3 +1,42 @@
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from .idempotency import claim, fingerprint
+from .models import Cart, CartItem, IdempotencyKey
+from .views import remove_cart_item
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        cart = Cart.objects.create(user_id=1)
+        self.item = CartItem.objects.create(
+            cart=cart, product_id=1, quantity=1, price=Decimal("10.00")
+        )
+
+    def remove(self, key):
+        request = self.factory.delete(
+            f"/api/cart/remove/{self.item.id}/", HTTP_IDEMPOTENCY_KEY=key
+        )
+        request.user_id = 1
+        return remove_cart_item(request, item_id=self.item.id)
+
+    def test_retry_replays_the_first_response(self):
+        first = self.remove("remove-1")
+        retry = self.remove("remove-1")
+
+        self.assertEqual(first.status_code, 204)
+        self.assertEqual(retry.status_code, 204)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(self.remove("remove-2").status_code, 404)
+
+    def test_expired_lease_is_taken_over(self):
+        request = self.factory.delete(f"/api/cart/remove/{self.item.id}/")
+        claim(1, "remove-1", fingerprint(request))
+        self.assertEqual(self.remove("remove-1").status_code, 409)
 
-# Create your tests here.
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        self.assertEqual(self.remove("remove-1").status_code, 204)
@@ -9,6 +9,7 @@ from .serializers import (
     CartSerializer, CartItemSerializer,
     AddToCartSerializer, UpdateCartItemSerializer
 )
+from .idempotency import idempotent
 from .services import ProductService
 import logging
 
@@ -47,6 +48,7 @@ class CartView(generics.RetrieveAPIView):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticatedCustom])
+@idempotent
 def add_to_cart(request):
     """Adding a product to the cart."""
 
@@ -130,6 +132,7 @@ def add_to_cart(request):
 
 @api_view(['PUT'])
 @permission_classes([IsAuthenticatedCustom])
+@idempotent
 def update_cart_item(request, item_id):
     """Updating the quantity of a product in the cart."""
     cart_item = get_object_or_404(
@@ -167,6 +170,7 @@ def update_cart_item(request, item_id):
 
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticatedCustom])
+@idempotent
 def remove_cart_item(request, item_id):
     """Removing a product from the cart."""
     cart_item = get_object_or_404(
@@ -182,6 +186,7 @@ def remove_cart_item(request, item_id):
 
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticatedCustom])
+@idempotent
 def clear_cart(request):
     """Clearing the cart."""
     try:
@@ -180,3 +180,8 @@ USER_SERVICE_URL = "http://localhost:8004"
 REDIS_HOST = "localhost"
 REDIS_PORT = 6379
 REDIS_DB = 0  #    cart-service (0  product, 1  cart)
+
+
+# Idempotency-Key responses are replayed to retries for this long
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+IDEMPOTENCY_LOCK_TIMEOUT = 60  # seconds a request holds its key before a retry may take over
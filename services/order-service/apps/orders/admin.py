@@ -1,11 +1,30 @@
 # orders/admin.py
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.urls import reverse
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from .models import Order, OrderItem
 
 
-#     
+# Пагинатор без полного COUNT(*): считает не больше ORDER_ADMIN_COUNT_LIMIT
+# строк, дальше страницы не нумеруются. На больших выборках date_hierarchy
+# точное число заказов не стоит скана всей таблицы.
+class ApproximateCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        limit = settings.ORDER_ADMIN_COUNT_LIMIT
+        return self.object_list.values("pk")[:limit].count()
+
+    # Счёт упёрся в лимит: в шаблоне число выводится как «10000+».
+    @cached_property
+    def capped(self):
+        return self.count >= settings.ORDER_ADMIN_COUNT_LIMIT
+
+
+# Инлайн для товаров в заказе
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
@@ -14,7 +33,7 @@ class OrderItemInline(admin.TabularInline):
 
     def subtotal(self, obj):
         return f"${obj.subtotal:.2f}"
-    subtotal.short_description = ""
+    subtotal.short_description = "Подытог"
 
 
 @admin.register(Order)
@@ -37,95 +56,105 @@ class OrderAdmin(admin.ModelAdmin):
     )
     search_fields = ("id", "user_id", "user_name", "user_email", "shipping_address")
     date_hierarchy = "created_at"
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
     inlines = [OrderItemInline]
     readonly_fields = (
         "user_id", "total_amount", "created_at", "updated_at",
         "items_count_calc", "total_quantity_calc"
     )
-    list_editable = ("status",)
     actions = ["mark_as_confirmed", "mark_as_shipped", "mark_as_delivered", "mark_as_cancelled"]
 
     fieldsets = (
-        (" ", {
+        ("Основная информация", {
             "fields": ("user_id", "user_name", "user_email")
         }),
-        ("  ", {
+        ("Доставка и статус", {
             "fields": ("status", "shipping_address")
         }),
-        ("", {
+        ("Финансы", {
             "fields": ("total_amount", "items_count_calc", "total_quantity_calc"),
-            "description": "    "
+            "description": "Сумма и количество рассчитываются автоматически"
         }),
-        ("", {
+        ("Даты", {
             "fields": ("created_at", "updated_at"),
             "classes": ("collapse",),
         }),
     )
 
-    #  
+    # Счётчики позиций — аннотации, а не запрос на каждую строку
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_item_counts()
+
+    # Цветной статус
     def colored_status(self, obj):
         colors = {
-            "pending": "#ffc107",      # 
-            "confirmed": "#007bff",    # 
-            "shipped": "#17a2b8",      # 
-            "delivered": "#28a745",    # 
-            "cancelled": "#dc3545",    # 
+            "pending": "#ffc107",      # жёлтый
+            "confirmed": "#007bff",    # синий
+            "shipped": "#17a2b8",      # бирюзовый
+            "delivered": "#28a745",    # зелёный
+            "cancelled": "#dc3545",    # красный
         }
         color = colors.get(obj.status, "#6c757d")
         return format_html(
             '<span style="background:{}; color:white; padding:4px 10px; border-radius:4px; font-size:11px;">{}</span>',
             color, obj.get_status_display()
         )
-    colored_status.short_description = ""
+    colored_status.short_description = "Статус"
 
-    #  
+    # Форматированная сумма
     def total_amount_formatted(self, obj):
         return f"${obj.total_amount:.2f}"
-    total_amount_formatted.short_description = ""
+    total_amount_formatted.short_description = "Сумма"
 
-    #    
+    # Дата в удобном виде
     def created_at_formatted(self, obj):
         return obj.created_at.strftime("%d.%m.%Y %H:%M")
-    created_at_formatted.short_description = ""
+    created_at_formatted.short_description = "Создан"
 
-    #   (   )
+    # Количество товаров (дублируем для детального просмотра)
     def items_count_calc(self, obj=None):
         return obj.items_count if obj and obj.pk else "-"
-    items_count_calc.short_description = "- "
+    items_count_calc.short_description = "Кол-во позиций"
 
     def total_quantity_calc(self, obj=None):
         return obj.total_quantity if obj and obj.pk else "-"
-    total_quantity_calc.short_description = "- "
+    total_quantity_calc.short_description = "Кол-во единиц"
 
-    #   
+    # Ссылка на товары
     def view_items_link(self, obj):
-        if obj.items.exists():
-            from django.urls import reverse
+        if obj.items_count:
             url = reverse("admin:orders_orderitem_changelist") + f"?order__id__exact={obj.id}"
-            return format_html('<a href="{}" style="color:#e83e8c;"> ?</a>', url)
-        return ""
-    view_items_link.short_description = ""
+            return format_html('<a href="{}" style="color:#e83e8c;">Товары ?</a>', url)
+        return "—"
+    view_items_link.short_description = "Товары"
+
+    # Массовые действия
+    def _transition(self, request, queryset, status, done_message):
+        moved, skipped = queryset.transition(status)
+        self.message_user(request, f"{done_message}: {len(moved)}.")
+        if skipped:
+            self.message_user(
+                request,
+                f"Пропущено заказов, для которых переход недопустим: {len(skipped)}.",
+                level=messages.WARNING
+            )
 
-    #  
     def mark_as_confirmed(self, request, queryset):
-        queryset.update(status="confirmed")
-        self.message_user(request, "  .")
-    mark_as_confirmed.short_description = " "
+        self._transition(request, queryset, "confirmed", "Подтверждено заказов")
+    mark_as_confirmed.short_description = "Подтвердить заказы"
 
     def mark_as_shipped(self, request, queryset):
-        queryset.update(status="shipped")
-        self.message_user(request, "   .")
-    mark_as_shipped.short_description = " "
+        self._transition(request, queryset, "shipped", "Отправлено заказов")
+    mark_as_shipped.short_description = "Отправить заказы"
 
     def mark_as_delivered(self, request, queryset):
-        queryset.update(status="delivered")
-        self.message_user(request, "   .")
-    mark_as_delivered.short_description = " "
+        self._transition(request, queryset, "delivered", "Доставлено заказов")
+    mark_as_delivered.short_description = "Доставить заказы"
 
     def mark_as_cancelled(self, request, queryset):
-        queryset.update(status="cancelled")
-        self.message_user(request, " .")
-    mark_as_cancelled.short_description = " "
+        self._transition(request, queryset, "cancelled", "Отменено заказов")
+    mark_as_cancelled.short_description = "Отменить заказы"
 
 
 @admin.register(OrderItem)
@@ -135,6 +164,16 @@ class OrderItemAdmin(admin.ModelAdmin):
     search_fields = ("product_name", "order__id", "order__user_id")
     readonly_fields = ("subtotal",)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Числовой запрос может быть id товара: точное совпадение по индексу
+        # (product_id, created_at) добавляется к обычному поиску по полям.
+        results, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        if search_term.strip().isdigit():
+            results |= queryset.filter(product_id=int(search_term))
+        return results, may_have_duplicates
+
     def subtotal(self, obj):
         return f"${obj.subtotal:.2f}"
-    subtotal.short_description = ""
\ No newline at end of file
+    subtotal.short_description = "Подытог"
\ No newline at end of file
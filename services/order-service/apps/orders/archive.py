@@ -0,0 +1,134 @@
+import base64
+import heapq
+import logging
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = [
+    status for status, targets in Order.TRANSITIONS.items() if not targets
+]
+
+
+def archive_db():
+    return settings.ORDER_ARCHIVE_DATABASE
+
+
+def copy_to(using, model, objects):
+    """
+    Insert `objects` into another database unchanged. bulk_create stamps
+    auto_now/auto_now_add fields with the current time, so the original
+    timestamps are written back afterwards.
+    """
+    stamped = [
+        field.attname for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    originals = [[getattr(obj, name) for name in stamped] for obj in objects]
+
+    model.objects.using(using).bulk_create(objects, ignore_conflicts=True)
+    for obj, values in zip(objects, originals):
+        for name, value in zip(stamped, values):
+            setattr(obj, name, value)
+    model.objects.using(using).bulk_update(objects, stamped)
+
+
+def archive_batch(cutoff, chunk_size):
+    """
+    Move one chunk of terminal orders last updated before `cutoff`.
+
+    The chunk is copied into the archive in one transaction, then
+    deleted from the hot tables in another. Copies ignore rows that are
+    already archived, so a run interrupted between the two steps simply
+    copies the chunk again. Returns the number of orders moved.
+    """
+    ids = list(
+        Order.objects.filter(status__in=TERMINAL_STATUSES, updated_at__lt=cutoff)
+        .order_by("id").values_list("id", flat=True)[:chunk_size]
+    )
+    if not ids:
+        return 0
+
+    orders = list(Order.objects.filter(id__in=ids))
+    items = list(OrderItem.objects.filter(order_id__in=ids))
+
+    with transaction.atomic(using=archive_db()):
+        copy_to(archive_db(), Order, orders)
+        copy_to(archive_db(), OrderItem, items)
+
+    with transaction.atomic():
+        OrderItem.objects.filter(order_id__in=ids).delete()
+        Order.objects.filter(id__in=ids).delete()
+
+    return len(ids)
+
+
+def archive_orders(older_than_days=None, chunk_size=None, on_chunk=None):
+    """Archive every terminal order older than the threshold, chunk by chunk."""
+    older_than_days = older_than_days or settings.ORDER_ARCHIVE_AFTER_DAYS
+    chunk_size = chunk_size or settings.ORDER_ARCHIVE_CHUNK_SIZE
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+
+    total = 0
+    while True:
+        moved = archive_batch(cutoff, chunk_size)
+        if not moved:
+            break
+        total += moved
+        if on_chunk:
+            on_chunk(moved)
+
+    logger.info(f"Archived {total} orders last updated before {cutoff}")
+    return total
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(order):
+    raw = f"{order.created_at.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, order_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(order_id)
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def history_page(querysets, cursor=None, limit=20):
+    """
+    One page of rows (orders or order items), newest first, merged from
+    several stores.
+
+    `querysets` are the same filtered query against the hot and archive
+    databases. Each is read through a (..., created_at, id) index with
+    at most limit + 1 rows after the cursor, then merged. Returns the
+    page and the cursor of the next one (None on the last page).
+    """
+    if cursor:
+        timestamp, order_id = decode_cursor(cursor)
+        after = Q(created_at__lt=timestamp) | Q(created_at=timestamp, id__lt=order_id)
+        querysets = [queryset.filter(after) for queryset in querysets]
+
+    merged = heapq.merge(
+        *(queryset.order_by("-created_at", "-id")[:limit + 1] for queryset in querysets),
+        key=lambda order: (order.created_at, order.id),
+        reverse=True
+    )
+    page = list(islice(merged, limit + 1))
+    if len(page) > limit:
+        return page[:limit], encode_cursor(page[limit - 1])
+    return page, None
@@ -0,0 +1,42 @@
+import json
+import logging
+
+import redis
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class RedisEventBus:
+    """Publishes events to the shared Redis `events` channel."""
+
+    channel = "events"
+
+    def __init__(self):
+        self.client = redis.Redis(
+            host=settings.REDIS_HOST, port=settings.REDIS_PORT,
+            db=settings.REDIS_DB, decode_responses=True
+        )
+
+    def publish_many(self, events):
+        """Publish a batch of events in a single pipelined round trip."""
+        pipeline = self.client.pipeline(transaction=False)
+        for event in events:
+            pipeline.publish(self.channel, json.dumps(event, cls=DjangoJSONEncoder))
+        pipeline.execute()
+
+
+class InMemoryEventBus:
+    """Stand-in bus that keeps published events in a list, for tests and local runs."""
+
+    def __init__(self):
+        self.published = []
+
+    def publish_many(self, events):
+        self.published.extend(events)
+
+
+def get_event_bus():
+    return import_string(settings.EVENT_BUS_BACKEND)()
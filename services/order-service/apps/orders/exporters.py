@@ -0,0 +1,135 @@
+import csv
+import heapq
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch, Q
+
+from .archive import archive_db, decode_cursor, encode_cursor
+from .models import Order, OrderItem
+
+EXPORT_FIELDS = [
+    "cursor", "order_id", "created_at", "status", "user_id",
+    "user_email", "user_name", "shipping_address", "total_amount",
+    "item_id", "product_id", "product_name", "quantity", "price", "subtotal",
+]
+
+
+def export_rows(order):
+    """
+    One flat row per order item; an order without items still gets one row.
+
+    Only the order's last row carries its cursor, so a cursor is never
+    handed out before all of that order's items have been sent.
+    """
+    base = {
+        "order_id": order.id,
+        "created_at": order.created_at,
+        "status": order.status,
+        "user_id": order.user_id,
+        "user_email": order.user_email,
+        "user_name": order.user_name,
+        "shipping_address": order.shipping_address,
+        "total_amount": order.total_amount,
+    }
+    items = order.items.all() or [None]
+    last = len(items) - 1
+    for index, item in enumerate(items):
+        yield {
+            "cursor": encode_cursor(order) if index == last else None,
+            **base,
+            "item_id": item.id if item else None,
+            "product_id": item.product_id if item else None,
+            "product_name": item.product_name if item else None,
+            "quantity": item.quantity if item else None,
+            "price": item.price if item else None,
+            "subtotal": item.subtotal if item else None,
+        }
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(orders):
+    encoder = DjangoJSONEncoder()
+    for order in orders:
+        for row in export_rows(order):
+            yield encoder.encode(row) + "\n"
+
+
+def csv_lines(orders):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for order in orders:
+        for row in export_rows(order):
+            yield writer.writerow([
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in (row[field] for field in EXPORT_FIELDS)
+            ])
+
+
+WRITERS = {
+    "ndjson": ("application/x-ndjson", ndjson_lines),
+    "csv": ("text/csv", csv_lines),
+}
+
+
+def encoded_blocks(lines, block_lines=None):
+    """Join lines into UTF-8 blocks so the server isn't flushing per row."""
+    block_lines = block_lines or settings.ORDER_EXPORT_CHUNK_SIZE
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) >= block_lines:
+            yield "".join(block).encode("utf-8")
+            block = []
+    if block:
+        yield "".join(block).encode("utf-8")
+
+
+def gzip_blocks(blocks):
+    """Compress a stream of byte blocks into a single gzip member."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_orders(start, end, cursor=None):
+    """
+    Orders created in [start, end) from the hot and archive databases,
+    oldest first, resuming after `cursor` (the last non-empty `cursor`
+    column received; any rows after it belong to an order that will be
+    sent again in full).
+
+    Each store is read with iterator(), which runs the items prefetch
+    once per chunk, and the two streams are merged lazily, so memory
+    stays flat whatever the range.
+    """
+    condition = Q(created_at__gte=start, created_at__lt=end)
+    if cursor:
+        timestamp, order_id = decode_cursor(cursor)
+        condition &= Q(created_at__gt=timestamp) | Q(created_at=timestamp, id__gt=order_id)
+
+    streams = [
+        Order.objects.using(db).filter(condition)
+        .order_by("created_at", "id")
+        .prefetch_related(Prefetch("items", queryset=OrderItem.objects.order_by("id")))
+        .iterator(chunk_size=settings.ORDER_EXPORT_CHUNK_SIZE)
+        for db in ("default", archive_db())
+    ]
+    return heapq.merge(*streams, key=lambda order: (order.created_at, order.id))
+
+
+def export_stream(start, end, file_format, cursor=None, compress=False):
+    """Bytes of the whole export, fetched from the databases in chunks."""
+    content_type, writer = WRITERS[file_format]
+    blocks = encoded_blocks(writer(export_orders(start, end, cursor)))
+    return content_type, gzip_blocks(blocks) if compress else blocks
@@ -0,0 +1,15 @@
+from django_filters import rest_framework as filters
+
+from .models import Order
+
+
+class OrderFilter(filters.FilterSet):
+    """Status and date-range filters served from the user's order indexes."""
+
+    status = filters.ChoiceFilter(choices=Order.STATUS_CHOICES)
+    created_after = filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="gte")
+    created_before = filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="lt")
+
+    class Meta:
+        model = Order
+        fields = ["status", "created_after", "created_before"]
@@ -0,0 +1,125 @@
+import functools
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+
+
+def fingerprint(request):
+    """Hash of what the request asks for, to spot a key reused for something else."""
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.path}\n".encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def claim(user_id, key, request_hash):
+    """
+    Take the key for this request under a lease of IDEMPOTENCY_LOCK_TIMEOUT
+    seconds. Returns (claimed_at, None) when this request owns it now,
+    otherwise (None, existing live record).
+
+    A key whose stored response or lease has run out (its request died
+    without releasing it) is taken over with a conditional UPDATE, so
+    only one of several concurrent retries wins it.
+    """
+    now = timezone.now()
+    lease = {
+        "fingerprint": request_hash, "status_code": None, "response": None,
+        "claimed_at": now,
+        "expires_at": now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT),
+    }
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(user_id=user_id, key=key, **lease)
+            return now, None
+        except IntegrityError:
+            pass
+        if IdempotencyKey.objects.filter(
+            user_id=user_id, key=key, expires_at__lte=now
+        ).update(**lease):
+            return now, None
+        record = IdempotencyKey.objects.filter(user_id=user_id, key=key).first()
+        if record is not None:
+            return None, record
+    return None, IdempotencyKey.objects.get(user_id=user_id, key=key)
+
+
+def idempotent(view):
+    """
+    Honour the Idempotency-Key header on a function view.
+
+    The first request with a key runs the view and stores its response;
+    repeats within IDEMPOTENCY_KEY_TTL get the stored response back
+    without running it again. Server errors and exceptions release the
+    key so the client can retry, and a request that dies without either
+    loses the key once its lease expires.
+    """
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+            return Response(
+                {"error": f"{HEADER} is too long"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        request_hash = fingerprint(request)
+        claimed_at, record = claim(request.user_id, key, request_hash)
+        if record is not None:
+            if record.fingerprint != request_hash:
+                return Response(
+                    {"error": f"{HEADER} was already used for a different request"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.status_code is None:
+                return Response(
+                    {"error": "A request with this key is still being processed"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            logger.info(f"Replaying response for {HEADER} {key}")
+            return Response(
+                record.response, status=record.status_code,
+                headers={"Idempotent-Replayed": "true"}
+            )
+
+        # Matching claimed_at keeps a request whose lease was taken over
+        # from touching the new owner's record.
+        owned = IdempotencyKey.objects.filter(
+            user_id=request.user_id, key=key, claimed_at=claimed_at
+        )
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            owned.delete()
+            raise
+
+        if response.status_code >= 500:
+            owned.delete()
+        else:
+            owned.update(
+                status_code=response.status_code, response=response.data,
+                expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+            )
+        return response
+
+    return wrapper
+
+
+def purge_expired():
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.orders.archive import archive_orders
+
+
+class Command(BaseCommand):
+    help = "Move delivered and cancelled orders older than the threshold to the archive database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days", type=int, default=settings.ORDER_ARCHIVE_AFTER_DAYS
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.ORDER_ARCHIVE_CHUNK_SIZE
+        )
+
+    def handle(self, *args, older_than_days, chunk_size, **options):
+        total = archive_orders(
+            older_than_days, chunk_size,
+            on_chunk=lambda moved: self.stdout.write(f"Archived {moved} orders")
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} orders"))
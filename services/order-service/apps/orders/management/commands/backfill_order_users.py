@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.orders.models import Order
+from apps.orders.users import enrich_orders
+
+
+class Command(BaseCommand):
+    help = "Fill missing user_email/user_name on orders from user-service, one lookup per chunk."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--database", default="default",
+            help="Database alias to backfill, e.g. archive",
+        )
+
+    def handle(self, *args, chunk_size, database, **options):
+        orders = Order.objects.using(database).filter(
+            Q(user_email="") | Q(user_name="")
+        ).order_by("id").only("id", "user_id", "user_email", "user_name")
+
+        last_id = 0
+        checked = filled = 0
+        while True:
+            chunk = list(orders.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            checked += len(chunk)
+
+            changed = enrich_orders(chunk)
+            if changed:
+                Order.objects.using(database).bulk_update(changed, ["user_email", "user_name"])
+            filled += len(changed)
+            self.stdout.write(f"Filled {len(changed)} of {len(chunk)} orders up to #{last_id}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Filled user details on {filled} of {checked} orders"
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders.rollups import backfill
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily sales rollup tables from the order history in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, chunk_size, **options):
+        def report(last_order_id, orders):
+            self.stdout.write(f"Added {orders} orders up to #{last_order_id}")
+
+        total = backfill(chunk_size=chunk_size, on_chunk=report)
+        self.stdout.write(self.style.SUCCESS(f"Rollups rebuilt from {total} orders"))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders.models import Order
+
+
+class Command(BaseCommand):
+    help = "Find orders whose total_amount drifted from their items and optionally fix them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--fix", action="store_true",
+            help="Recompute drifted totals instead of only reporting them",
+        )
+
+    def handle(self, *args, chunk_size, fix, **options):
+        last_id = 0
+        checked = drifted = 0
+
+        while True:
+            ids = list(
+                Order.objects.filter(id__gt=last_id).order_by("id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            checked += len(ids)
+
+            rows = list(
+                Order.objects.filter(id__in=ids).drifted()
+                .values_list("id", "total_amount", "computed_total")
+            )
+            for order_id, stored, computed in rows:
+                self.stdout.write(f"Order #{order_id}: stored {stored}, items total {computed}")
+            drifted += len(rows)
+            if fix and rows:
+                Order.objects.filter(id__in=[row[0] for row in rows]).recompute_totals()
+
+        action = "fixed" if fix else "found"
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} orders, {action} {drifted} with a drifted total"
+        ))
@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.orders.events import get_event_bus
+from apps.orders.outbox import outbox_lag, purge_published, relay_batch
+
+
+class Command(BaseCommand):
+    help = "Publish pending order outbox events to the event bus in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--interval", type=float, default=settings.ORDER_OUTBOX_INTERVAL,
+            help="Seconds to wait between polls when the outbox is empty",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Drain the outbox and exit instead of polling forever",
+        )
+
+    def handle(self, *args, batch_size, interval, once, **options):
+        bus = get_event_bus()
+
+        while True:
+            published = relay_batch(bus, batch_size)
+            if published:
+                lag = outbox_lag()
+                self.stdout.write(
+                    f"Published {published} outbox rows, {lag['pending']} pending, "
+                    f"oldest {lag['oldest_pending_age']}s"
+                )
+                if lag["oldest_pending_age"] > settings.ORDER_OUTBOX_LAG_WARNING:
+                    self.stderr.write(
+                        f"Outbox is lagging {lag['oldest_pending_age']}s behind"
+                    )
+                continue
+
+            purged = purge_published()
+            if purged:
+                self.stdout.write(f"Purged {purged} published outbox rows")
+            if once:
+                break
+            time.sleep(interval)
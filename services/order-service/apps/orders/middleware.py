@@ -0,0 +1,46 @@
+from django.http import JsonResponse
+from .services import UserService
+from .users import display_name, user_directory
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JWTAuthenticationMiddleware:
+    """
+    Resolve the bearer token through user-service and attach the user
+    to the request. Requests without a token pass through unauthenticated
+    and are rejected by the views' permission classes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Skip health check and admin routes"""
+        if request.path.startswith("/admin/") or request.path.startswith("/health"):
+            return self.get_response(request)
+
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return self.get_response(request)
+
+        token = auth_header.split(" ")[1]
+        user_data = UserService.get_user_details(token)
+        if not user_data:
+            logger.warning(
+                f"Failed to authenticate user for request to {request.path}"
+            )
+            return JsonResponse(
+                {
+                    "error": "Invalid token",
+                    "message": "The provided authentication token is invalid"
+                }, status=401
+            )
+
+        user_directory.prime({user_data["id"]: user_data})
+        request.user_id = user_data["id"]
+        request.user_email = user_data.get("email", "")
+        request.user_name = display_name(user_data)
+        request.auth_token = token
+        return self.get_response(request)
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:57
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_processed(apps, schema_editor):
+    # Orders placed before post-processing existed must not get it now.
+    Order = apps.get_model("orders", "Order")
+    Order.objects.using(schema_editor.connection.alias).update(
+        post_processed_at=F("created_at")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='post_processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(
+            mark_existing_processed, migrations.RunPython.noop,
+            hints={"model_name": "order"}
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('post_processed_at__isnull', True)), fields=['id'], name='order_post_processing_idx'),
+        ),
+    ]
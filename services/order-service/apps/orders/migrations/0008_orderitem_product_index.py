@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_order_post_processing'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['product_id', 'created_at', 'id'], name='orderitem_product_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_orderitem_product_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='reservation_id',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_idempotency_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='post_processing_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='post_processing_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
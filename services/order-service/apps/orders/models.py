@@ -1,7 +1,155 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models.functions import Abs, Coalesce
+from django.utils import timezone
 from decimal import Decimal
 
 
+class OutboxEvent(models.Model):
+    """
+    Order event written in the same transaction as the change it
+    describes; the relay publishes pending rows to the event bus.
+    """
+
+    event_type = models.CharField(max_length=100)
+    aggregate_id = models.BigIntegerField()
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['id'], name='order_outbox_pending_idx',
+                condition=models.Q(published_at__isnull=True)
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.aggregate_id}"
+
+
+def items_total(order_ref="pk"):
+    """Sum(quantity * price) of an order's items as a subquery, 0 without items."""
+    total = (
+        OrderItem.objects.filter(order=models.OuterRef(order_ref))
+        .order_by().values("order")
+        .annotate(total=models.Sum(
+            models.F("quantity") * models.F("price"),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2)
+        ))
+        .values("total")
+    )
+    return Coalesce(
+        models.Subquery(total), Decimal("0.00"),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2)
+    )
+
+
+class OrderQuerySet(models.QuerySet):
+    def with_computed_total(self):
+        return self.annotate(computed_total=items_total())
+
+    def drifted(self):
+        """Orders whose stored total_amount differs from their items by a cent or more."""
+        return self.with_computed_total().annotate(
+            drift=Abs(models.F("total_amount") - models.F("computed_total"))
+        ).filter(drift__gte=Decimal("0.005"))
+
+    def recompute_totals(self):
+        """
+        Set total_amount from the items of every order in the queryset with
+        a single UPDATE, keeping the sales rollups in step. Returns the
+        number of orders updated.
+        """
+        from . import rollups
+
+        with transaction.atomic():
+            ids = list(self.values_list("id", flat=True))
+            if not ids:
+                return 0
+            rollups.remove_orders(ids)
+            updated = Order.objects.filter(id__in=ids).update(
+                total_amount=items_total(), updated_at=timezone.now()
+            )
+            rollups.add_orders(ids)
+        return updated
+
+    def with_item_counts(self):
+        """Item count and total quantity annotated, read by the properties."""
+        items = (
+            OrderItem.objects.filter(order=models.OuterRef("pk"))
+            .order_by().values("order")
+        )
+        # Correlated subqueries rather than JOIN + GROUP BY, so only the
+        # rows of the requested page are counted.
+        return self.annotate(
+            annotated_items_count=Coalesce(models.Subquery(
+                items.annotate(count=models.Count("id")).values("count")
+            ), 0),
+            annotated_total_quantity=Coalesce(models.Subquery(
+                items.annotate(total=models.Sum("quantity")).values("total")
+            ), 0),
+        )
+
+    def with_summary(self):
+        """
+        Items prefetched and counts annotated, so serializing a page of
+        orders costs the same number of queries whatever its size.
+        """
+        return self.with_item_counts().prefetch_related("items")
+
+    def transition(self, to_status):
+        """
+        Move every order in the queryset that may legally go to
+        `to_status`, with one UPDATE per source status.
+
+        Every moved order gets the same order.<status> outbox event a
+        single save would write, all inserted with one bulk INSERT.
+        Returns (moved_ids, skipped_ids).
+        """
+        from . import rollups
+
+        sources = [
+            status for status, targets in Order.TRANSITIONS.items()
+            if to_status in targets
+        ]
+        moved = []
+
+        with transaction.atomic():
+            for source in sources:
+                ids = list(
+                    self.filter(status=source).select_for_update()
+                    .order_by("id").values_list("id", flat=True)
+                )
+                if not ids:
+                    continue
+
+                rollups.remove_orders(ids)
+                Order.objects.filter(id__in=ids, status=source).update(
+                    status=to_status, updated_at=timezone.now()
+                )
+                rollups.add_orders(ids)
+                moved += ids
+
+            OutboxEvent.objects.bulk_create(
+                OutboxEvent(
+                    event_type=f"order.{to_status}",
+                    aggregate_id=order.id,
+                    payload=order.event_payload()
+                )
+                for order in Order.objects.filter(id__in=moved)
+                .prefetch_related("items").order_by("id")
+            )
+
+            skipped = list(
+                self.exclude(id__in=moved).order_by("id").values_list("id", flat=True)
+            )
+
+        return moved, skipped
+
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ("pending", "Pending"),
@@ -10,6 +158,13 @@ class Order(models.Model):
         ("delivered", "Delivered"),
         ("cancelled", "Cancelled"),
     ]
+    TRANSITIONS = {
+        "pending": {"confirmed", "cancelled"},
+        "confirmed": {"shipped", "cancelled"},
+        "shipped": {"delivered"},
+        "delivered": set(),
+        "cancelled": set(),
+    }
 
     user_id = models.IntegerField()
     status = models.CharField(
@@ -27,31 +182,128 @@ class Order(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Id of the product-service stock reservation the order was placed with.
+    reservation_id = models.CharField(max_length=64, blank=True)
+    # Set once the asynchronous post-order work (apps.orders.tasks) is done.
+    post_processed_at = models.DateTimeField(null=True, blank=True)
+    # When a worker last took the order, and how often; orders that used up
+    # ORDER_POST_PROCESSING_MAX_ATTEMPTS are left for a person to look at.
+    post_processing_started_at = models.DateTimeField(null=True, blank=True)
+    post_processing_attempts = models.PositiveSmallIntegerField(default=0)
+
+    objects = OrderQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user_id", "created_at", "id"],
+                name="order_user_created_idx"
+            ),
+            models.Index(
+                fields=["user_id", "status", "created_at", "id"],
+                name="order_user_status_created_idx"
+            ),
+            models.Index(
+                fields=["id"], name="order_post_processing_idx",
+                condition=models.Q(post_processed_at__isnull=True)
+            ),
+        ]
 
 
     def __str__(self):
         return f"Order #{self.id} - {self.user_id}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def event_payload(self, items=None):
+        items = self.items.all() if items is None else items
+        return {
+            "order_id": self.id,
+            "reservation_id": self.reservation_id,
+            "user_id": self.user_id,
+            "status": self.status,
+            "total_amount": str(self.total_amount),
+            "items": [
+                {"product_id": item.product_id, "quantity": item.quantity}
+                for item in items
+            ],
+        }
+
+    def record_event(self, event_type, items=None):
+        """Add an event for this order to the outbox; call inside the write's transaction."""
+        return OutboxEvent.objects.create(
+            event_type=event_type,
+            aggregate_id=self.id,
+            payload=self.event_payload(items)
+        )
+
+    def can_transition_to(self, status):
+        return status in self.TRANSITIONS[self._loaded_status]
+
+    def clean(self):
+        previous = getattr(self, "_loaded_status", None)
+        if previous is not None and previous != self.status \
+                and not self.can_transition_to(self.status):
+            raise ValidationError({
+                "status": f"Cannot move an order from {previous} to {self.status}."
+            })
+
+    def save(self, *args, **kwargs):
+        """Save and record status changes in the outbox atomically."""
+        from . import rollups
+
+        previous = getattr(self, "_loaded_status", None)
+        status_changed = previous is not None and previous != self.status
+
+        with transaction.atomic():
+            if status_changed:
+                rollups.remove_orders([self.id])
+            super().save(*args, **kwargs)
+            if status_changed:
+                rollups.add_orders([self.id])
+                self.record_event(f"order.{self.status}")
+
+        self._loaded_status = self.status
+
+    def _items_prefetched(self):
+        return "items" in getattr(self, "_prefetched_objects_cache", {})
+
     @property
     def items_count(self):
         """Count of items in the order."""
+        if hasattr(self, "annotated_items_count"):
+            return self.annotated_items_count
+        if self._items_prefetched():
+            return len(self.items.all())
         return self.items.count()
     
     @property
     def total_quantity(self):
+        if hasattr(self, "annotated_total_quantity"):
+            return self.annotated_total_quantity
         return sum(
             item.quantity for item in self.items.all()
         )
     
     def calculate_total(self):
-        total = sum(
-            item.subtotal for item in self.items.all()
-        )
+        """Total of the items, computed by the database in one aggregate."""
+        total = self.items.aggregate(total=models.Sum(
+            models.F("quantity") * models.F("price"),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2)
+        ))["total"] or Decimal("0.00")
         self.total_amount = total
         return total
+
+    def recompute_total(self):
+        """Store the items' total with one UPDATE and reload it."""
+        Order.objects.filter(pk=self.pk).recompute_totals()
+        self.refresh_from_db(fields=["total_amount", "updated_at"])
+        return self.total_amount
     
 
 class OrderItem(models.Model):
@@ -66,9 +318,86 @@ class OrderItem(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["product_id", "created_at", "id"],
+                name="orderitem_product_created_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"Order Item #{self.quantity} - {self.product_name}"
     
     @property
     def subtotal(self):
-        return self.quantity * self.price
\ No newline at end of file
+        return self.quantity * self.price
+
+
+class DailySales(models.Model):
+    """Orders, revenue and units per day of order creation and current status."""
+
+    date = models.DateField()
+    status = models.CharField(max_length=10)
+    orders = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    units = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "status"], name="daily_sales_date_status_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.status}: {self.revenue}"
+
+
+class DailyProductSales(models.Model):
+    """Units and revenue per day, product and current order status."""
+
+    date = models.DateField()
+    product_id = models.IntegerField()
+    status = models.CharField(max_length=10)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "product_id", "status"],
+                name="daily_product_sales_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["product_id", "date"], name="daily_product_sales_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} product {self.product_id} {self.status}: {self.units}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response stored for a client's Idempotency-Key, replayed to retries
+    until it expires. `status_code` is empty while the request runs, and
+    `expires_at` is then the end of that request's lease.
+    """
+
+    user_id = models.IntegerField()
+    key = models.CharField(max_length=100)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    claimed_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user_id", "key"], name="idempotency_user_key_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="idempotency_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.user_id})"
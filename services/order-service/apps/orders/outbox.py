@@ -0,0 +1,80 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+from .events import get_event_bus
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+def to_event(row):
+    return {
+        "type": row.event_type,
+        "event_id": row.id,
+        "occurred_at": row.created_at,
+        "data": row.payload,
+    }
+
+
+def relay_batch(bus=None, batch_size=None):
+    """
+    Publish one batch of pending outbox rows, oldest first.
+
+    Every row is its own event: consumers act on each transition (a cart
+    is cleared on order.created, stock comes back on order.cancelled), so
+    nothing is coalesced. Rows are marked as published only after the bus
+    accepted the batch, so a crash in between re-publishes them
+    (at-least-once delivery). Returns the number of rows published.
+    """
+    bus = bus or get_event_bus()
+    batch_size = batch_size or settings.ORDER_OUTBOX_BATCH_SIZE
+
+    with transaction.atomic():
+        rows = list(
+            OutboxEvent.objects.filter(published_at__isnull=True)
+            .order_by("id")[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        bus.publish_many([to_event(row) for row in rows])
+        OutboxEvent.objects.filter(
+            id__in=[row.id for row in rows]
+        ).update(published_at=timezone.now())
+
+    logger.info(f"Published {len(rows)} order events")
+    return len(rows)
+
+
+def outbox_lag():
+    """
+    How far the relay is behind: pending rows, age of the oldest one in
+    seconds and when anything was last published. One aggregate query.
+    """
+    stats = OutboxEvent.objects.aggregate(
+        pending=Count("id", filter=Q(published_at__isnull=True)),
+        oldest_pending=Min("created_at", filter=Q(published_at__isnull=True)),
+        last_published=Max("published_at"),
+    )
+    oldest = stats["oldest_pending"]
+    return {
+        "pending": stats["pending"],
+        "oldest_pending_age": (
+            round((timezone.now() - oldest).total_seconds(), 3) if oldest else 0.0
+        ),
+        "last_published_at": stats["last_published"],
+    }
+
+
+def purge_published(older_than=None):
+    """Delete outbox rows published before the retention window."""
+    older_than = older_than or timedelta(days=settings.ORDER_OUTBOX_RETENTION_DAYS)
+    deleted, _ = OutboxEvent.objects.filter(
+        published_at__lt=timezone.now() - older_than
+    ).delete()
+    return deleted
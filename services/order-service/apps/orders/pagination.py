@@ -0,0 +1,54 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .archive import InvalidCursor, history_page
+
+
+class OrderCursorPagination(BasePagination):
+    """
+    Keyset pagination over (created_at, id), newest first.
+
+    Every page is a range scan on the (user_id, created_at, id) index
+    instead of an OFFSET, so deep pages cost the same as the first one.
+    paginate_querysets() merges the hot and archived orders into one
+    history.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def paginate_querysets(self, querysets, request, view=None):
+        self.request = request
+        try:
+            page, self.next_cursor = history_page(
+                querysets,
+                request.query_params.get(self.cursor_query_param),
+                self.get_page_size(request)
+            )
+        except InvalidCursor:
+            raise NotFound("Invalid cursor")
+        return page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_querysets([queryset], request, view)
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
@@ -0,0 +1,16 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsAuthenticatedCustom(BasePermission):
+    """
+    Requests whose user JWTAuthenticationMiddleware resolved through
+    user-service. The default for every view; others opt out explicitly.
+    """
+
+    def has_permission(self, request, view):
+        return (
+            getattr(request, 'user_id', None) is not None
+        )
+
+    def has_object_permission(self, request, view, obj):
+        return True
@@ -0,0 +1,130 @@
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import TruncDate
+
+from .archive import archive_db
+from .models import DailyProductSales, DailySales, Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+
+def contributions(order_ids, using=DEFAULT_DB_ALIAS):
+    """
+    What the given orders add to each rollup table under their current
+    status, computed with two grouped queries against the `using` store.
+
+    Returns ({(date, status): [orders, revenue, units]},
+             {(date, product_id, status): [units, revenue]}).
+    """
+    daily = defaultdict(lambda: [0, Decimal("0.00"), 0])
+    products = {}
+
+    orders = (
+        Order.objects.using(using).filter(id__in=order_ids)
+        .annotate(date=TruncDate("created_at"))
+        .values("date", "status").order_by()
+        .annotate(count=Count("id"), revenue=Sum("total_amount"))
+    )
+    for row in orders:
+        daily[(row["date"], row["status"])][:2] = [row["count"], row["revenue"]]
+
+    items = (
+        OrderItem.objects.using(using).filter(order_id__in=order_ids)
+        .annotate(date=TruncDate("order__created_at"), status=F("order__status"))
+        .values("date", "product_id", "status").order_by()
+        .annotate(
+            units=Sum("quantity"),
+            revenue=Sum(F("quantity") * F("price"), output_field=DecimalField(max_digits=14, decimal_places=2)),
+        )
+    )
+    for row in items:
+        products[(row["date"], row["product_id"], row["status"])] = [row["units"], row["revenue"]]
+        daily[(row["date"], row["status"])][2] += row["units"]
+
+    return daily, products
+
+
+def _upsert(table, keys, values, rows):
+    """Add `rows` to `table` with one batched INSERT ... ON CONFLICT DO UPDATE."""
+    if not rows:
+        return
+    columns = keys + values
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET "
+            + ", ".join(f"{column} = {table}.{column} + excluded.{column}" for column in values),
+            rows
+        )
+
+
+def apply(order_ids, sign=1, using=DEFAULT_DB_ALIAS):
+    """
+    Add (sign=1) or subtract (sign=-1) the orders' current contribution.
+    The orders are read from `using`; the rollups always live in default.
+    """
+    daily, products = contributions(order_ids, using)
+    _upsert(
+        DailySales._meta.db_table, ["date", "status"], ["orders", "revenue", "units"],
+        [
+            (date.isoformat(), status, sign * orders, str(sign * revenue), sign * units)
+            for (date, status), (orders, revenue, units) in daily.items()
+        ]
+    )
+    _upsert(
+        DailyProductSales._meta.db_table, ["date", "product_id", "status"], ["units", "revenue"],
+        [
+            (date.isoformat(), product_id, status, sign * units, str(sign * revenue))
+            for (date, product_id, status), (units, revenue) in products.items()
+        ]
+    )
+
+
+def add_orders(order_ids):
+    apply(order_ids, 1)
+
+
+def remove_orders(order_ids):
+    apply(order_ids, -1)
+
+
+def backfill(chunk_size=1000, on_chunk=None):
+    """
+    Rebuild both rollup tables from the order history, hot and archived.
+
+    Orders are read in id chunks from each store and every chunk is added
+    in its own transaction; the tables are emptied first, so run it while
+    order writes are paused or accept that the ones made meanwhile are
+    lost until the next run. Archived orders that are still in the hot
+    tables (an archive run stopped between copy and delete) count once.
+    """
+    DailySales.objects.all().delete()
+    DailyProductSales.objects.all().delete()
+
+    total = 0
+    for using in (DEFAULT_DB_ALIAS, archive_db()):
+        last_id = 0
+        while True:
+            ids = list(
+                Order.objects.using(using).filter(id__gt=last_id).order_by("id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            if using != DEFAULT_DB_ALIAS:
+                hot = set(Order.objects.filter(id__in=ids).values_list("id", flat=True))
+                ids = [order_id for order_id in ids if order_id not in hot]
+            with transaction.atomic():
+                apply(ids, 1, using)
+            total += len(ids)
+            if on_chunk:
+                on_chunk(last_id, len(ids))
+
+    logger.info(f"Sales rollups rebuilt from {total} orders")
+    return total
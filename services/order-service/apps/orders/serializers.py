@@ -3,7 +3,7 @@ from .models import Order, OrderItem
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    subtotal = serializers.SerializerMethodField(
+    subtotal = serializers.DecimalField(
         read_only=True, max_digits=10, decimal_places=2
     )
 
@@ -38,10 +38,10 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
 
 
-class CreateOrderSerializer(serializers.ModelSerializer):
+class CreateOrderSerializer(serializers.Serializer):
     shipping_address = serializers.CharField(max_length=500)
 
-    def validate_shopping_address(self, value):
+    def validate_shipping_address(self, value):
         if len(value.strip()) < 10:
             raise serializers.ValidationError(
                 "Shipping address must be at least 10 characters long."
@@ -58,4 +58,54 @@ class UpdateOrderStatusSerializer(serializers.ModelSerializer):
         ("cancelled", "Cancelled"),
     ]
 
-    status = serializers.ChoiceField(choices=STATUS_CHOICES)
\ No newline at end of file
+    status = serializers.ChoiceField(choices=STATUS_CHOICES)
+
+class SalesReportQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    status = serializers.ChoiceField(
+        choices=[choice for choice, _ in Order.STATUS_CHOICES], required=False
+    )
+    product_id = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if attrs["date_from"] > attrs["date_to"]:
+            raise serializers.ValidationError("date_from must not be after date_to.")
+        return attrs
+
+
+class OrderExportQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    cursor = serializers.CharField(required=False)
+
+    def validate(self, attrs):
+        if attrs["date_from"] > attrs["date_to"]:
+            raise serializers.ValidationError("date_from must not be after date_to.")
+        return attrs
+
+
+class ProductOrdersQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if "date_from" in attrs and "date_to" in attrs \
+                and attrs["date_from"] > attrs["date_to"]:
+            raise serializers.ValidationError("date_from must not be after date_to.")
+        return attrs
+
+
+class ProductOrderLineSerializer(serializers.ModelSerializer):
+    """An order line of one product, with the order it belongs to."""
+
+    item_id = serializers.IntegerField(source="id")
+    status = serializers.CharField(source="order.status")
+    user_id = serializers.IntegerField(source="order.user_id")
+
+    class Meta:
+        model = OrderItem
+        fields = [
+            "item_id", "order_id", "created_at", "status", "user_id",
+            "quantity", "price",
+        ]
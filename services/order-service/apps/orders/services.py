@@ -0,0 +1,238 @@
+import logging
+import uuid
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+import requests
+from django.conf import settings
+from django.db import transaction
+
+from . import rollups
+from .models import Order, OrderItem
+from .tasks import schedule_post_processing
+from .users import display_name, user_directory
+
+logger = logging.getLogger(__name__)
+
+
+class OrderPlacementError(Exception):
+    """Order could not be placed; carries the HTTP status and details for the client."""
+
+    def __init__(self, message, status_code=400, details=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.details = details or {}
+
+
+class UserService:
+    """Service for interacting with the user API."""
+
+    @staticmethod
+    def get_user_details(token: str) -> Optional[Dict[str, Any]]:
+        """Obtaining user details from the API by token."""
+        try:
+            response = requests.get(
+                f"{settings.USER_SERVICE_URL}/api/users/profile/",
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=10
+            )
+
+            if response.status_code == 200:
+                return response.json()
+            return None
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching user details: {e}")
+            return None
+
+
+class CartService:
+    """Service for interacting with the cart API."""
+
+    @staticmethod
+    def get_cart(token: str) -> Optional[Dict[str, Any]]:
+        """Obtain the cart of the user the token belongs to."""
+        try:
+            response = requests.get(
+                f"{settings.CART_SERVICE_URL}/api/cart/",
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=10
+            )
+
+            if response.status_code == 200:
+                return response.json()
+            return None
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching cart: {e}")
+            return None
+
+
+class ProductService:
+    """Service for interacting with the product API."""
+
+    @staticmethod
+    def _headers() -> Dict[str, str]:
+        return {"X-Service-Token": settings.SERVICE_TOKEN}
+
+    @staticmethod
+    def reserve_products(reservation_id: str, quantities: Dict[int, int]) -> Dict[str, Any]:
+        """
+        Reserve all lines in one all-or-nothing call under `reservation_id`.
+
+        Returns the product-service answer; `success` is False when any
+        line can't be served or the service is unreachable. `uncertain`
+        is set when the reservation may have been made anyway (a timeout
+        or server error), so the caller should release it.
+        """
+        try:
+            response = requests.post(
+                f"{settings.PRODUCT_SERVICE_URL}/api/products/reserve/",
+                json={
+                    "reservation_id": reservation_id,
+                    "items": [
+                        {"product_id": product_id, "quantity": quantity}
+                        for product_id, quantity in quantities.items()
+                    ]
+                },
+                headers=ProductService._headers(),
+                timeout=10
+            )
+            if response.status_code in (200, 409):
+                return response.json()
+            return {
+                "success": False,
+                "uncertain": response.status_code >= 500,
+                "message": f"Product service answered {response.status_code}"
+            }
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error reserving products: {e}")
+            return {"success": False, "uncertain": True, "message": "Product service is unavailable"}
+
+    @staticmethod
+    def release_products(reservation_id: str) -> bool:
+        """
+        Return the stock of a reservation in one call. Safe to repeat;
+        product-service also reclaims holds that are never released.
+        """
+        try:
+            response = requests.post(
+                f"{settings.PRODUCT_SERVICE_URL}/api/products/release/",
+                json={"reservation_id": reservation_id},
+                headers=ProductService._headers(),
+                timeout=10
+            )
+            return response.status_code == 200
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error releasing products: {e}")
+            return False
+
+    @staticmethod
+    def confirm_reservation(reservation_id: str) -> bool:
+        """
+        Tell product-service the order of a reservation was placed, so the
+        hold isn't reclaimed when it expires. Safe to repeat.
+        """
+        try:
+            response = requests.post(
+                f"{settings.PRODUCT_SERVICE_URL}/api/products/confirm/",
+                json={"reservation_id": reservation_id},
+                headers=ProductService._headers(),
+                timeout=10
+            )
+            if response.status_code == 200:
+                return True
+            logger.error(
+                f"Product service answered {response.status_code} confirming reservation {reservation_id}"
+            )
+            return False
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error confirming reservation {reservation_id}: {e}")
+            return False
+
+
+def place_order(user_id, token, shipping_address, user_email="", user_name=""):
+    """
+    Turn the user's cart into an order.
+
+    Costs a fixed number of round trips whatever the basket size: one
+    cart fetch, one batched reservation, one transaction that inserts
+    the order, all of its items, the order.created outbox event and the
+    sales rollup increments, and one call confirming the reservation
+    once that transaction commits. Slower follow-up work is queued for
+    apps.orders.tasks. If anything fails after the reservation, or the
+    reservation itself times out, the whole batch is released again.
+    """
+    if not user_email or not user_name:
+        user = user_directory.get(user_id) or {}
+        user_email = user_email or user.get("email", "")
+        user_name = user_name or display_name(user)
+
+    cart = CartService.get_cart(token)
+    if not cart or not cart.get("items"):
+        raise OrderPlacementError("Cart is empty")
+
+    quantities = {}
+    for item in cart["items"]:
+        product_id = int(item["product_id"])
+        quantities[product_id] = quantities.get(product_id, 0) + int(item["quantity"])
+
+    reservation_id = uuid.uuid4().hex
+    reservation = ProductService.reserve_products(reservation_id, quantities)
+    if not reservation.get("success"):
+        if reservation.get("uncertain") and not ProductService.release_products(reservation_id):
+            logger.error(f"Could not release reservation {reservation_id} for user {user_id}")
+        raise OrderPlacementError(
+            reservation.get("message", "Products could not be reserved"),
+            status_code=409,
+            details={"unavailable": reservation.get("unavailable", [])}
+        )
+
+    try:
+        with transaction.atomic():
+            order = Order(
+                user_id=user_id,
+                shipping_address=shipping_address,
+                user_email=user_email or "",
+                user_name=user_name or "",
+                reservation_id=reservation_id,
+            )
+            items = []
+            total = Decimal("0.00")
+            for line in reservation["items"]:
+                price = Decimal(line["price"])
+                quantity = quantities[line["product_id"]]
+                total += price * quantity
+                items.append(OrderItem(
+                    product_id=line["product_id"],
+                    product_name=line["name"],
+                    quantity=quantity,
+                    price=price,
+                ))
+
+            order.total_amount = total
+            order.save()
+            for item in items:
+                item.order = order
+            OrderItem.objects.bulk_create(items)
+            order.record_event("order.created", items)
+            rollups.add_orders([order.id])
+            transaction.on_commit(
+                lambda: ProductService.confirm_reservation(reservation_id), robust=True
+            )
+            # Robust: the order is committed by now, so a broker outage must
+            # not reach the except below and release its stock.
+            transaction.on_commit(schedule_post_processing, robust=True)
+
+    except Exception:
+        logger.exception(f"Failed to save order for user {user_id}, releasing stock")
+        if not ProductService.release_products(reservation_id):
+            logger.error(f"Could not release reservation {reservation_id} for user {user_id}")
+        raise
+
+    logger.info(f"Order #{order.id} placed for user {user_id}: {len(items)} items, {total}")
+    return order
@@ -0,0 +1,148 @@
+import logging
+from datetime import timedelta
+from smtplib import SMTPException
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Order
+from .users import enrich_orders
+
+logger = logging.getLogger(__name__)
+
+SCHEDULED_KEY = "orders:post-processing:scheduled"
+
+
+def schedule_post_processing():
+    """
+    Queue a post-processing run for newly committed orders.
+
+    Orders aren't passed along: the run picks up every order not yet
+    post-processed, and only one run is queued per
+    ORDER_POST_PROCESSING_DELAY, so a burst of orders is handled as one
+    batch and repeated requests for the same order coalesce.
+    """
+    delay = settings.ORDER_POST_PROCESSING_DELAY
+    if cache.add(SCHEDULED_KEY, 1, delay):
+        process_pending_orders.apply_async(countdown=delay)
+
+
+def send_confirmation(order, connection):
+    """Order confirmation email, sent over the batch's mail connection."""
+    if order.user_email:
+        EmailMessage(
+            f"Order #{order.id} received",
+            f"Hello {order.user_name or 'customer'},\n\n"
+            f"we received your order #{order.id} for {order.total_amount}.\n"
+            f"It will be shipped to: {order.shipping_address}\n",
+            settings.DEFAULT_FROM_EMAIL,
+            [order.user_email],
+            connection=connection,
+        ).send()
+
+
+def enrich_users(orders):
+    """Missing contact details from user-service, one lookup for the batch."""
+    changed = enrich_orders(orders)
+    if changed:
+        Order.objects.bulk_update(changed, ["user_email", "user_name"])
+
+
+def claim_batch(batch_size):
+    """
+    Take up to `batch_size` pending orders for this worker.
+
+    The orders are locked only while they are marked as started and their
+    attempt is counted; the work itself runs outside any transaction.
+    Orders another worker started less than ORDER_POST_PROCESSING_LEASE
+    seconds ago, and orders out of attempts, are skipped.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.ORDER_POST_PROCESSING_LEASE)
+    with transaction.atomic():
+        orders = list(
+            Order.objects.filter(
+                post_processed_at__isnull=True,
+                post_processing_attempts__lt=settings.ORDER_POST_PROCESSING_MAX_ATTEMPTS,
+            )
+            .filter(
+                Q(post_processing_started_at__isnull=True)
+                | Q(post_processing_started_at__lt=stale)
+            )
+            .select_for_update(skip_locked=True)
+            .order_by("id")[:batch_size]
+        )
+        Order.objects.filter(id__in=[order.id for order in orders]).update(
+            post_processing_started_at=now,
+            post_processing_attempts=F("post_processing_attempts") + 1
+        )
+    for order in orders:
+        order.post_processing_attempts += 1
+    return orders
+
+
+def process_order(order, connection):
+    """
+    Post-process one order and stamp it. On failure the order keeps its
+    start time, so it is retried once its lease has run out. Returns
+    whether it succeeded.
+    """
+    try:
+        send_confirmation(order, connection)
+    except (OSError, SMTPException) as e:
+        if order.post_processing_attempts >= settings.ORDER_POST_PROCESSING_MAX_ATTEMPTS:
+            logger.error(f"Giving up post-processing order #{order.id}: {e}")
+        else:
+            logger.warning(f"Post-processing order #{order.id} failed, will retry: {e}")
+        return False
+
+    Order.objects.filter(id=order.id).update(post_processed_at=timezone.now())
+    return True
+
+
+@shared_task(
+    autoretry_for=(OSError, SMTPException),
+    retry_backoff=True, retry_backoff_max=300, retry_jitter=True,
+    max_retries=5,
+)
+def process_pending_orders(batch_size=None):
+    """
+    Post-process all pending orders, a claimed batch at a time.
+
+    Each order is stamped with post_processed_at as soon as its own work
+    succeeded, so one failing email doesn't hold back or repeat the rest
+    of the batch. Failed orders are picked up again by the periodic
+    sweep after ORDER_POST_PROCESSING_LEASE, until they run out of
+    attempts. Returns the number of orders processed.
+    """
+    cache.delete(SCHEDULED_KEY)
+    batch_size = batch_size or settings.ORDER_POST_PROCESSING_BATCH_SIZE
+    processed = 0
+
+    while True:
+        orders = claim_batch(batch_size)
+        if not orders:
+            break
+        try:
+            enrich_users(orders)
+            connection = get_connection()
+            connection.open()
+        except Exception:
+            # Nothing was sent: hand the batch back for the task retry.
+            Order.objects.filter(id__in=[order.id for order in orders]).update(
+                post_processing_started_at=None
+            )
+            raise
+        try:
+            processed += sum(process_order(order, connection) for order in orders)
+        finally:
+            connection.close()
+
+    if processed:
+        logger.info(f"Post-processed {processed} orders")
+    return processed
@@ -1,3 +1,715 @@
-from django.test import TestCase
+import gzip
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import idempotency, rollups, tasks, users
+from .archive import archive_orders
+from .events import InMemoryEventBus
+from .models import (
+    DailyProductSales, DailySales, IdempotencyKey, Order, OrderItem, OutboxEvent
+)
+from .outbox import outbox_lag, relay_batch
+from .serializers import OrderSerializer
+from .users import user_directory
+from .services import (
+    CartService, OrderPlacementError, ProductService, UserService, place_order
+)
+
+
+CART = {"items": [
+    {"product_id": 1, "quantity": 2},
+    {"product_id": 2, "quantity": 1},
+    {"product_id": 1, "quantity": 1},
+]}
+
+ANN = {"id": 7, "email": "ann@example.com", "first_name": "Ann", "last_name": "Lee"}
+
+RESERVATION = {"success": True, "items": [
+    {"product_id": 1, "name": "Phone", "price": "100.00"},
+    {"product_id": 2, "name": "Case", "price": "15.50"},
+]}
+
+
+@mock.patch.object(ProductService, "confirm_reservation", return_value=True)
+@mock.patch.object(ProductService, "release_products", return_value=True)
+@mock.patch.object(ProductService, "reserve_products", return_value=RESERVATION)
+@mock.patch.object(CartService, "get_cart", return_value=CART)
+class PlaceOrderTests(TestCase):
+    def setUp(self):
+        user_directory.clear()
+        patcher = mock.patch.object(users, "fetch_users", return_value={7: ANN})
+        self.fetch_users = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cart_is_reserved_in_one_call(self, get_cart, reserve, release, confirm):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = place_order(7, "token", "Main st. 1")
+        self.assertEqual((order.user_email, order.user_name), ("ann@example.com", "Ann Lee"))
+
+        reserve.assert_called_once_with(order.reservation_id, {1: 3, 2: 1})
+        confirm.assert_called_once_with(order.reservation_id)
+        release.assert_not_called()
+        self.assertEqual(order.total_amount, Decimal("315.50"))
+        self.assertEqual(order.items.count(), 2)
+
+        [event] = OutboxEvent.objects.all()
+        self.assertEqual(event.event_type, "order.created")
+        self.assertEqual(event.payload["user_id"], 7)
+        self.assertEqual(event.payload["reservation_id"], order.reservation_id)
+        self.assertEqual(len(event.payload["items"]), 2)
+
+    def test_unavailable_products_are_reported(self, get_cart, reserve, release, confirm):
+        reserve.return_value = {
+            "success": False, "message": "Insufficient stock",
+            "unavailable": [{"product_id": 2, "available": 0}],
+        }
+
+        with self.assertRaises(OrderPlacementError) as ctx:
+            place_order(7, "token", "Main st. 1")
+
+        self.assertEqual(ctx.exception.status_code, 409)
+        self.assertEqual(ctx.exception.details["unavailable"][0]["product_id"], 2)
+        self.assertFalse(Order.objects.exists())
+        release.assert_not_called()
+
+    def test_retried_request_with_idempotency_key_is_replayed(self, get_cart, reserve, release, confirm):
+        headers = {"HTTP_AUTHORIZATION": "Bearer token", "HTTP_IDEMPOTENCY_KEY": "checkout-1"}
+        body = {"shipping_address": "Main st. 1, Springfield"}
+
+        with mock.patch.object(UserService, "get_user_details", return_value={"id": 7}):
+            first = self.client.post("/api/orders/create/", body, **headers)
+            second = self.client.post("/api/orders/create/", body, **headers)
+            other = self.client.post(
+                "/api/orders/create/", {"shipping_address": "Other st. 2, Springfield"}, **headers
+            )
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json()["id"], first.json()["id"])
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(other.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+        reserve.assert_called_once()
+
+    def test_key_of_a_request_that_died_is_taken_over_after_its_lease(self, get_cart, reserve, release, confirm):
+        headers = {"HTTP_AUTHORIZATION": "Bearer token", "HTTP_IDEMPOTENCY_KEY": "checkout-1"}
+        body = {"shipping_address": "Main st. 1, Springfield"}
+        request_hash = idempotency.fingerprint(RequestFactory().post("/api/orders/create/", body))
+        stale, _ = idempotency.claim(7, "checkout-1", request_hash)
+
+        with mock.patch.object(UserService, "get_user_details", return_value={"id": 7}):
+            busy = self.client.post("/api/orders/create/", body, **headers)
+            IdempotencyKey.objects.update(expires_at=timezone.now())
+            taken_over = self.client.post("/api/orders/create/", body, **headers)
+
+        self.assertEqual(busy.status_code, 409)
+        self.assertEqual(taken_over.status_code, 201)
+        record = IdempotencyKey.objects.get()
+        self.assertEqual(record.status_code, 201)
+        self.assertGreater(record.expires_at, timezone.now() + timedelta(hours=1))
+        self.assertFalse(IdempotencyKey.objects.filter(claimed_at=stale).exists())
+
+    def test_reservation_is_released_when_saving_fails(self, get_cart, reserve, release, confirm):
+        with mock.patch.object(Order, "save", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                place_order(7, "token", "Main st. 1")
+
+        reservation_id, _ = reserve.call_args.args
+        release.assert_called_once_with(reservation_id)
+
+    def test_reservation_that_timed_out_is_released(self, get_cart, reserve, release, confirm):
+        reserve.return_value = {
+            "success": False, "uncertain": True, "message": "Product service is unavailable"
+        }
+
+        with self.assertRaises(OrderPlacementError):
+            place_order(7, "token", "Main st. 1")
+
+        reservation_id, _ = reserve.call_args.args
+        release.assert_called_once_with(reservation_id)
+
+
+class PlaceOrderCommitTests(TransactionTestCase):
+    """place_order with real commits, so on_commit callbacks run inside it."""
+
+    def setUp(self):
+        cache.delete(tasks.SCHEDULED_KEY)
+        for target, name, value in [
+            (CartService, "get_cart", CART),
+            (ProductService, "reserve_products", RESERVATION),
+            (ProductService, "release_products", True),
+            (ProductService, "confirm_reservation", True),
+        ]:
+            patcher = mock.patch.object(target, name, return_value=value)
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def test_broker_outage_after_commit_keeps_the_order_and_its_stock(self):
+        with mock.patch.object(
+            tasks.process_pending_orders, "apply_async", side_effect=OSError("broker down")
+        ) as apply_async:
+            order = place_order(7, "token", "Main st. 1", "ann@example.com", "Ann Lee")
+
+        apply_async.assert_called_once()
+        self.assertTrue(Order.objects.filter(id=order.id).exists())
+        self.confirm_reservation.assert_called_once_with(order.reservation_id)
+        self.release_products.assert_not_called()
+
+
+@override_settings(SERVICE_TOKEN="secret")
+class ProductServiceTests(TestCase):
+    def test_reservation_calls_carry_the_service_token(self):
+        with mock.patch("requests.post", side_effect=requests.Timeout) as post:
+            result = ProductService.reserve_products("r-1", {1: 2})
+
+        self.assertTrue(result["uncertain"])
+        self.assertEqual(post.call_args.kwargs["headers"], {"X-Service-Token": "secret"})
+        self.assertEqual(post.call_args.kwargs["json"], {
+            "reservation_id": "r-1", "items": [{"product_id": 1, "quantity": 2}]
+        })
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.order = Order.objects.create(user_id=1, shipping_address="Main st. 1")
+        self.order.items.create(
+            product_id=3, product_name="Phone", quantity=2, price=Decimal("10.00")
+        )
+
+    def test_status_change_is_written_to_outbox(self):
+        self.order.save()
+        self.assertFalse(OutboxEvent.objects.exists())
+
+        order = Order.objects.get(pk=self.order.pk)
+        order.status = "cancelled"
+        order.save()
+
+        [event] = OutboxEvent.objects.all()
+        self.assertEqual(event.event_type, "order.cancelled")
+        self.assertEqual(event.payload["items"], [{"product_id": 3, "quantity": 2}])
+
+    def test_relay_publishes_every_transition_once(self):
+        self.order.status = "confirmed"
+        self.order.save()
+        self.order.status = "cancelled"
+        self.order.save()
+        self.assertEqual(outbox_lag()["pending"], 2)
+
+        bus = InMemoryEventBus()
+        self.assertEqual(relay_batch(bus), 2)
+        self.assertEqual(relay_batch(bus), 0)
+
+        self.assertEqual(
+            [e["type"] for e in bus.published],
+            ["order.confirmed", "order.cancelled"]
+        )
+        lag = outbox_lag()
+        self.assertEqual(lag["pending"], 0)
+        self.assertIsNotNone(lag["last_published_at"])
+
+
+class OrderListingQueryTests(TestCase):
+    databases = {"default", "archive"}
+
+    def setUp(self):
+        self.orders = []
+        for i in range(50):
+            order = Order.objects.create(user_id=1, shipping_address="Main st. 1")
+            order.items.create(product_id=1, product_name="Phone", quantity=2, price=Decimal("10.00"))
+            order.items.create(product_id=2, product_name="Case", quantity=i, price=Decimal("1.00"))
+            self.orders.append(order.id)
+
+    def test_page_of_fifty_orders_costs_constant_queries(self):
+        orders = Order.objects.filter(user_id=1).with_summary()[:50]
+
+        # One query for the orders with their counts, one for all items.
+        with self.assertNumQueries(2):
+            data = OrderSerializer(orders, many=True).data
+
+        self.assertEqual(len(data), 50)
+        self.assertTrue(all(row["items_count"] == 2 for row in data))
+        self.assertEqual(sum(row["total_quantity"] for row in data), 50 * 2 + sum(range(50)))
+
+    @mock.patch.object(UserService, "get_user_details", return_value={"id": 1})
+    def test_list_view_uses_summary_queryset(self, get_user):
+        # Page of orders and prefetched items, plus the (empty) archive
+        # page; the cursor needs no count.
+        with self.assertNumQueries(2), self.assertNumQueries(1, using="archive"):
+            response = self.client.get(
+                "/api/orders/?page_size=50", HTTP_AUTHORIZATION="Bearer token"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 50)
+
+    def test_anonymous_requests_are_refused(self):
+        self.assertEqual(self.client.get("/api/orders/").status_code, 403)
+        self.assertEqual(self.client.post("/api/orders/create/").status_code, 403)
+
+    @mock.patch.object(UserService, "get_user_details", return_value={"id": 1})
+    def test_history_pages_by_cursor_and_filters(self, get_user):
+        cancelled = self.orders[:3]
+        Order.objects.filter(pk__in=cancelled).update(status="cancelled")
+
+        seen = []
+        url = "/api/orders/?page_size=20"
+        while url:
+            page = self.client.get(url, HTTP_AUTHORIZATION="Bearer token").json()
+            seen += [row["id"] for row in page["results"]]
+            url = page["next"]
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(len(set(seen)), 50)
+
+        response = self.client.get(
+            "/api/orders/?status=cancelled", HTTP_AUTHORIZATION="Bearer token"
+        )
+        self.assertEqual([row["id"] for row in response.json()["results"]], cancelled[::-1])
+
+        response = self.client.get(
+            "/api/orders/?created_after=not-a-date", HTTP_AUTHORIZATION="Bearer token"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class TransitionTests(TestCase):
+    def setUp(self):
+        self.orders = []
+        for status in ["pending", "pending", "confirmed", "shipped", "cancelled"]:
+            order = Order.objects.create(user_id=1, shipping_address="Main st. 1", status=status)
+            order.items.create(product_id=1, product_name="Phone", quantity=2, price=Decimal("10.00"))
+            order.items.create(product_id=2, product_name="Case", quantity=1, price=Decimal("1.00"))
+            self.orders.append(order.id)
+
+    def test_bulk_cancel_moves_legal_orders_with_one_event_per_order(self):
+        moved, skipped = Order.objects.all().transition("cancelled")
+
+        self.assertEqual(moved, self.orders[:3])
+        self.assertEqual(skipped, self.orders[3:])
+        self.assertEqual(Order.objects.filter(status="cancelled").count(), 4)
+
+        events = list(OutboxEvent.objects.order_by("id"))
+        self.assertEqual([e.event_type for e in events], ["order.cancelled"] * 3)
+        self.assertEqual([e.payload["order_id"] for e in events], self.orders[:3])
+        self.assertEqual(
+            events[0].payload,
+            Order.objects.get(id=self.orders[0]).event_payload()
+        )
+
+    def test_query_count_does_not_grow_with_the_selection(self):
+        for _ in range(20):
+            Order.objects.create(user_id=1, shipping_address="Main st. 1")
+
+        # Per source status: select, update and 2 x (two grouped selects +
+        # two upserts) for the sales rollups; then the moved orders, their
+        # items and the outbox insert, the skipped lookup and the savepoint pair.
+        with self.assertNumQueries(26):
+            Order.objects.all().transition("cancelled")
+
+    def test_illegal_single_change_fails_validation(self):
+        order = Order.objects.get(status="shipped")
+        order.status = "pending"
+        with self.assertRaises(ValidationError):
+            order.full_clean()
+
+
+class SalesRollupTests(TestCase):
+    databases = {"default", "archive"}
+
+    def setUp(self):
+        for status in ["pending", "confirmed", "confirmed"]:
+            order = Order.objects.create(
+                user_id=1, shipping_address="Main st. 1", total_amount=Decimal("21.00")
+            )
+            order.items.create(product_id=1, product_name="Phone", quantity=2, price=Decimal("10.00"))
+            order.items.create(product_id=2, product_name="Case", quantity=1, price=Decimal("1.00"))
+            rollups.add_orders([order.id])
+            if status != "pending":
+                order.status = status
+                order.save()
+
+    def snapshot(self):
+        return (
+            sorted(DailySales.objects.filter(orders__gt=0).values_list("status", "orders", "revenue", "units")),
+            sorted(DailyProductSales.objects.filter(units__gt=0).values_list("product_id", "status", "units", "revenue")),
+        )
+
+    def test_rollups_follow_status_changes(self):
+        Order.objects.filter(status="confirmed").transition("cancelled")
+
+        daily, products = self.snapshot()
+        self.assertEqual(daily, [
+            ("cancelled", 2, Decimal("42.00"), 6),
+            ("pending", 1, Decimal("21.00"), 3),
+        ])
+        self.assertIn((1, "cancelled", 4, Decimal("40.00")), products)
+
+    def test_backfill_matches_incremental_rollups(self):
+        incremental = self.snapshot()
+        self.assertEqual(rollups.backfill(chunk_size=2), 3)
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_backfill_includes_archived_orders(self):
+        Order.objects.filter(status="confirmed").transition("cancelled")
+        Order.objects.filter(status="cancelled").update(
+            updated_at=timezone.now() - timedelta(days=200)
+        )
+        self.assertEqual(archive_orders(older_than_days=90), 2)
+        incremental = self.snapshot()
+
+        self.assertEqual(rollups.backfill(chunk_size=2), 3)
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_report_reads_rollups(self):
+        User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.login(username="admin", password="password")
+        today = timezone.now().date().isoformat()
+
+        response = self.client.get(
+            f"/api/orders/reports/sales/?date_from={today}&date_to={today}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["totals"], {"orders": 3, "revenue": "63.00", "units": 9}
+        )
+        self.assertEqual(response.json()["days"][0]["revenue"], "63.00")
+
+        response = self.client.get(
+            f"/api/orders/reports/sales/?date_from={today}&date_to={today}&product_id=2"
+        )
+        self.assertEqual(response.json()["totals"], {"revenue": "3.00", "units": 3})
+
+
+class ArchiveTests(TestCase):
+    databases = {"default", "archive"}
+
+    def setUp(self):
+        old = timezone.now() - timedelta(days=200)
+        self.orders = []
+        for status in ["delivered", "cancelled", "pending", "delivered"]:
+            order = Order.objects.create(user_id=1, shipping_address="Main st. 1", status=status)
+            order.items.create(product_id=1, product_name="Phone", quantity=1, price=Decimal("10.00"))
+            self.orders.append(order.id)
+        Order.objects.filter(id__in=self.orders[:3]).update(created_at=old, updated_at=old)
+
+    def test_old_terminal_orders_are_moved_in_chunks(self):
+        self.assertEqual(archive_orders(older_than_days=90, chunk_size=1), 2)
+
+        self.assertEqual(
+            list(Order.objects.order_by("id").values_list("id", flat=True)), self.orders[2:]
+        )
+        archived = Order.objects.using("archive").order_by("id")
+        self.assertEqual([order.id for order in archived], self.orders[:2])
+        self.assertEqual(OrderItem.objects.using("archive").count(), 2)
+        self.assertLess(archived[0].created_at, timezone.now() - timedelta(days=100))
+
+    @mock.patch.object(UserService, "get_user_details", return_value={"id": 1})
+    def test_history_reads_both_stores(self, get_user):
+        archive_orders(older_than_days=90)
+
+        seen = []
+        url = "/api/orders/?page_size=1"
+        while url:
+            page = self.client.get(url, HTTP_AUTHORIZATION="Bearer token").json()
+            seen += [(row["id"], row["items_count"]) for row in page["results"]]
+            url = page["next"]
+        self.assertEqual(seen, [(order_id, 1) for order_id in reversed(self.orders)])
+
+        response = self.client.get(
+            f"/api/orders/{self.orders[0]}/", HTTP_AUTHORIZATION="Bearer token"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "delivered")
+
+
+class OrderExportTests(TestCase):
+    databases = {"default", "archive"}
+
+    def setUp(self):
+        old = timezone.now() - timedelta(days=200)
+        self.orders = []
+        for status in ["delivered", "pending", "pending"]:
+            order = Order.objects.create(user_id=1, shipping_address="Main st. 1", status=status)
+            order.items.create(product_id=1, product_name="Phone", quantity=1, price=Decimal("10.00"))
+            order.items.create(product_id=2, product_name="Case", quantity=2, price=Decimal("1.00"))
+            self.orders.append(order.id)
+        Order.objects.filter(id=self.orders[0]).update(updated_at=old)
+        archive_orders(older_than_days=90)
+
+        User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.login(username="admin", password="password")
+        today = timezone.now().date().isoformat()
+        self.url = f"/api/orders/export/?date_from={today}&date_to={today}"
+
+    def rows(self, response):
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_export_flattens_items_from_both_stores(self):
+        rows = self.rows(self.client.get(self.url))
+
+        self.assertEqual(
+            [row["order_id"] for row in rows], [order_id for order_id in self.orders for _ in range(2)]
+        )
+        self.assertEqual(rows[1]["subtotal"], "2.00")
+
+    def test_export_resumes_after_cursor(self):
+        cursor = self.rows(self.client.get(self.url))[1]["cursor"]
+
+        rows = self.rows(self.client.get(f"{self.url}&cursor={cursor}"))
+        self.assertEqual(
+            [row["order_id"] for row in rows], [order_id for order_id in self.orders[1:] for _ in range(2)]
+        )
+
+    def test_export_cut_off_mid_order_resends_that_order(self):
+        received = self.rows(self.client.get(self.url))[:3]
+        self.assertIsNone(received[2]["cursor"])
+        cursor = [row["cursor"] for row in received if row["cursor"]][-1]
+
+        rows = self.rows(self.client.get(f"{self.url}&cursor={cursor}"))
+        self.assertEqual(rows[0]["item_id"], received[2]["item_id"])
+        self.assertEqual(
+            [row["order_id"] for row in rows], [order_id for order_id in self.orders[1:] for _ in range(2)]
+        )
+
+    def test_csv_export_is_gzipped_on_request(self):
+        response = self.client.get(f"{self.url}&output=csv", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        lines = gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:2], ["cursor", "order_id"])
+        self.assertEqual(len(lines), 7)
+
+
+class ProductOrdersTests(TestCase):
+    databases = {"default", "archive"}
+
+    def setUp(self):
+        old = timezone.now() - timedelta(days=200)
+        self.orders = []
+        for status in ["delivered", "pending", "cancelled"]:
+            order = Order.objects.create(user_id=1, shipping_address="Main st. 1", status=status)
+            order.items.create(product_id=1, product_name="Phone", quantity=2, price=Decimal("10.00"))
+            order.items.create(product_id=2, product_name="Case", quantity=1, price=Decimal("1.00"))
+            self.orders.append(order.id)
+        Order.objects.filter(id=self.orders[0]).update(updated_at=old)
+        archive_orders(older_than_days=90)
+
+        User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.login(username="admin", password="password")
+
+    def test_orders_of_product_are_paged_across_stores(self):
+        seen = []
+        url = "/api/orders/by-product/1/?page_size=2"
+        while url:
+            page = self.client.get(url).json()
+            seen += [(row["order_id"], row["status"], row["quantity"]) for row in page["results"]]
+            url = page["next"]
+
+        first, second, third = self.orders
+        self.assertEqual(
+            seen, [(third, "cancelled", 2), (second, "pending", 2), (first, "delivered", 2)]
+        )
+
+    def test_sales_are_grouped_by_status(self):
+        today = timezone.now().date().isoformat()
+        response = self.client.get(f"/api/orders/by-product/1/sales/?date_from={today}")
+
+        data = response.json()
+        self.assertEqual((data["units"], data["orders"], data["revenue"]), (6, 3, "60.00"))
+        self.assertEqual(data["by_status"]["delivered"]["revenue"], "20.00")
+        self.assertEqual(data["by_status"]["delivered"]["units"], 2)
+
+    def test_requires_staff(self):
+        self.client.logout()
+
+        self.assertEqual(self.client.get("/api/orders/by-product/1/").status_code, 403)
+
+
+class OrderTotalTests(TestCase):
+    def setUp(self):
+        self.orders = []
+        for total in ["21.00", "5.00", "0.00"]:
+            order = Order.objects.create(
+                user_id=1, shipping_address="Main st. 1", total_amount=Decimal(total)
+            )
+            order.items.create(product_id=1, product_name="Phone", quantity=2, price=Decimal("10.00"))
+            order.items.create(product_id=2, product_name="Case", quantity=1, price=Decimal("1.00"))
+            self.orders.append(order.id)
+
+    def test_total_is_computed_by_the_database(self):
+        order = Order.objects.get(pk=self.orders[1])
+        with self.assertNumQueries(1):
+            self.assertEqual(order.calculate_total(), Decimal("21.00"))
+
+    def test_command_fixes_drifted_totals_in_chunks(self):
+        self.assertEqual(sorted(Order.objects.drifted().values_list("id", flat=True)), self.orders[1:])
+
+        out = StringIO()
+        call_command("recompute_order_totals", "--fix", "--chunk-size=2", stdout=out)
+
+        self.assertIn("fixed 2", out.getvalue())
+        self.assertFalse(Order.objects.drifted().exists())
+        self.assertEqual(
+            set(Order.objects.values_list("total_amount", flat=True)), {Decimal("21.00")}
+        )
+
+
+class PostProcessingTests(TestCase):
+    def setUp(self):
+        user_directory.clear()
+        patcher = mock.patch.object(users, "fetch_users", return_value={})
+        self.fetch_users = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_orders_are_post_processed_in_one_batch_after_commit(self):
+        for i in range(3):
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                with transaction.atomic():
+                    Order.objects.create(
+                        user_id=i, user_email=f"user{i}@example.com",
+                        shipping_address="Main st. 1"
+                    )
+                    transaction.on_commit(tasks.schedule_post_processing)
+            self.assertEqual(len(callbacks), 1)
+
+        with mock.patch.object(tasks.process_pending_orders, "apply_async") as apply_async:
+            for callback in callbacks * 3:
+                callback()
+        apply_async.assert_called_once()
+
+        self.assertEqual(tasks.process_pending_orders(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(Order.objects.filter(post_processed_at__isnull=True).exists())
+        self.assertEqual(tasks.process_pending_orders(), 0)
+
+    @override_settings(ORDER_POST_PROCESSING_MAX_ATTEMPTS=2)
+    def test_failed_order_is_retried_after_its_lease_until_out_of_attempts(self):
+        failing = Order.objects.create(
+            user_id=1, user_email="bounce@example.com", shipping_address="Main st. 1"
+        )
+        Order.objects.create(user_id=2, user_email="b@example.com", shipping_address="Main st. 1")
+
+        def send(message):
+            if message.to == ["bounce@example.com"]:
+                raise OSError("mailbox unavailable")
+            mail.outbox.append(message)
+            return 1
+
+        with mock.patch.object(tasks.EmailMessage, "send", autospec=True, side_effect=send):
+            self.assertEqual(tasks.process_pending_orders.run(), 1)
+            self.assertEqual(tasks.process_pending_orders.run(), 0)
+
+            Order.objects.update(post_processing_started_at=timezone.now() - timedelta(days=1))
+            self.assertEqual(tasks.process_pending_orders.run(), 0)
+            Order.objects.update(post_processing_started_at=timezone.now() - timedelta(days=1))
+            self.assertEqual(tasks.process_pending_orders.run(), 0)
+
+        self.assertEqual([message.to for message in mail.outbox], [["b@example.com"]])
+        failing.refresh_from_db()
+        self.assertIsNone(failing.post_processed_at)
+        self.assertEqual(failing.post_processing_attempts, 2)
+
+    def test_failure_before_sending_hands_the_batch_back(self):
+        Order.objects.create(user_id=1, user_email="a@example.com", shipping_address="Main st. 1")
+
+        with mock.patch.object(tasks, "enrich_users", side_effect=OSError):
+            with self.assertRaises(OSError):
+                tasks.process_pending_orders.run()
+
+        self.assertEqual(tasks.process_pending_orders.run(), 1)
+
+
+class UserDirectoryTests(TestCase):
+    def setUp(self):
+        user_directory.clear()
+        for user_id in [7, 7, 8, 9]:
+            Order.objects.create(user_id=user_id, shipping_address="Main st. 1")
+
+    @mock.patch.object(users, "fetch_users", return_value={7: ANN, 8: None})
+    def test_lookups_are_batched_and_cached(self, fetch_users):
+        self.assertEqual(set(user_directory.get_many([7, 8, 7])), {7})
+        self.assertEqual(set(user_directory.get_many([8, 7])), {7})
+
+        fetch_users.assert_called_once_with([7, 8])
+
+    @mock.patch.object(users, "fetch_users", return_value={7: ANN, 8: None})
+    def test_cache_is_bounded(self, fetch_users):
+        with self.settings(USER_DIRECTORY_MAX_ENTRIES=1):
+            user_directory.get_many([7, 8])
+            user_directory.get_many([7])
+
+        self.assertEqual(fetch_users.call_count, 2)
+
+    def test_backfill_makes_one_call_per_chunk(self):
+        with mock.patch.object(users, "fetch_users", return_value={7: ANN, 8: None}) as fetch_users:
+            call_command("backfill_order_users", "--chunk-size=3", stdout=StringIO())
+
+        self.assertEqual(fetch_users.call_count, 2)
+        self.assertEqual(
+            Order.objects.filter(user_email="ann@example.com", user_name="Ann Lee").count(), 2
+        )
+
+
+class OrderAdminTests(TestCase):
+    def setUp(self):
+        User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.login(username="admin", password="password")
+
+    def add_orders(self, count):
+        for _ in range(count):
+            order = Order.objects.create(user_id=1, shipping_address="Main st. 1")
+            order.items.create(product_id=1, product_name="Phone", quantity=2, price=Decimal("10.00"))
+        return order
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/admin/orders/order/")
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.add_orders(2)
+        few, _ = self.changelist_queries()
+        last = self.add_orders(40)
+        many, response = self.changelist_queries()
+
+        self.assertEqual(few, many)
+        self.assertContains(response, f"order__id__exact={last.id}")
+
+    @override_settings(ORDER_ADMIN_COUNT_LIMIT=5)
+    def test_changelist_count_stops_at_limit(self):
+        self.add_orders(8)
+
+        _, response = self.changelist_queries()
+        self.assertEqual(response.context["cl"].result_count, 5)
+        self.assertContains(response, "5+ orders")
+
+        Order.objects.filter(id__in=list(Order.objects.values_list("id", flat=True)[:4])).delete()
+        _, response = self.changelist_queries()
+        self.assertContains(response, "4 orders")
+        self.assertNotContains(response, "4+ orders")
+
+    def test_numeric_item_search_matches_product_id_and_fields(self):
+        order = Order.objects.create(user_id=1, shipping_address="Main st. 1")
+        by_id = order.items.create(product_id=15, product_name="Phone", quantity=1, price=Decimal("1.00"))
+        by_name = order.items.create(product_id=3, product_name="Case 15", quantity=1, price=Decimal("1.00"))
+        order.items.create(product_id=4, product_name="Charger", quantity=1, price=Decimal("1.00"))
+
+        response = self.client.get("/admin/orders/orderitem/?q=15")
+
+        self.assertEqual(
+            {item.id for item in response.context["cl"].result_list}, {by_id.id, by_name.id}
+        )
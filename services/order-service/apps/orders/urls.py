@@ -0,0 +1,12 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path("orders/", views.OrderListView.as_view(), name="order-list"),
+    path("orders/create/", views.create_order, name="order-create"),
+    path("orders/export/", views.export_orders, name="order-export"),
+    path("orders/reports/sales/", views.sales_report, name="sales-report"),
+    path("orders/by-product/<int:product_id>/", views.ProductOrdersView.as_view(), name="product-orders"),
+    path("orders/by-product/<int:product_id>/sales/", views.ProductSalesView.as_view(), name="product-sales"),
+    path("orders/<int:pk>/", views.OrderDetailView.as_view(), name="order-detail"),
+]
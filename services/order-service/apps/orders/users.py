@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_users(user_ids):
+    """
+    Contact details of several users in one user-service call, keyed by
+    id; ids user-service doesn't know map to None. Returns None when the
+    service can't be reached.
+    """
+    try:
+        response = requests.post(
+            f"{settings.USER_SERVICE_URL}/api/users/batch/",
+            json={"ids": list(user_ids)},
+            headers={"X-Service-Token": settings.SERVICE_TOKEN},
+            timeout=10
+        )
+        if response.status_code != 200:
+            logger.error(f"User batch lookup answered {response.status_code}")
+            return None
+
+        data = response.json()
+        users = dict.fromkeys(data.get("missing", []))
+        users.update((user["id"], user) for user in data["users"])
+        return users
+
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error fetching users: {e}")
+        return None
+
+
+def display_name(user):
+    return " ".join(filter(None, [user.get("first_name"), user.get("last_name")]))
+
+
+class UserDirectory:
+    """
+    Per-process cache of user contact details from user-service.
+
+    Entries expire after USER_DIRECTORY_TTL and the cache is capped at
+    USER_DIRECTORY_MAX_ENTRIES, least recently used out first. Misses
+    are fetched through the batch endpoint, one call per
+    USER_DIRECTORY_BATCH_SIZE ids.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, user_ids):
+        now = time.monotonic()
+        found = {}
+        missing = []
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._entries.get(user_id)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(user_id)
+                    found[user_id] = entry[1]
+                else:
+                    missing.append(user_id)
+        return found, missing
+
+    def prime(self, users):
+        """Store {user_id: user or None}; unknown users are cached as None."""
+        expires = time.monotonic() + settings.USER_DIRECTORY_TTL
+        max_entries = settings.USER_DIRECTORY_MAX_ENTRIES
+        with self._lock:
+            for user_id, user in users.items():
+                self._entries.pop(user_id, None)
+                self._entries[user_id] = (expires, user)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def get_many(self, user_ids):
+        """
+        Map user id -> {"id", "email", "first_name", "last_name"} for
+        the ids user-service knows. Ids it couldn't be asked about
+        (service down) are left out and not cached.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        found, missing = self._cached(user_ids)
+
+        batch_size = settings.USER_DIRECTORY_BATCH_SIZE
+        for start in range(0, len(missing), batch_size):
+            fetched = fetch_users(missing[start:start + batch_size])
+            if fetched is None:
+                break
+            self.prime(fetched)
+            found.update(fetched)
+
+        return {user_id: user for user_id, user in found.items() if user is not None}
+
+    def get(self, user_id):
+        return self.get_many([user_id]).get(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_directory = UserDirectory()
+
+
+def enrich_orders(orders):
+    """
+    Fill missing user_email/user_name on `orders` from the directory
+    with one lookup for the whole list. Returns the orders that changed;
+    saving them is up to the caller.
+    """
+    pending = [order for order in orders if not order.user_email or not order.user_name]
+    users = user_directory.get_many(order.user_id for order in pending)
+
+    changed = []
+    for order in pending:
+        user = users.get(order.user_id)
+        if user is None:
+            continue
+        order.user_email = order.user_email or user.get("email") or ""
+        order.user_name = order.user_name or display_name(user)
+        changed.append(order)
+    return changed
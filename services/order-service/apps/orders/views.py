@@ -1,47 +1,282 @@
-from .models import Order, OrderItem
+from .models import DailyProductSales, DailySales, Order, OrderItem
 from django.db import transaction
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.decorators import (
+    api_view, authentication_classes, permission_classes
+)
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db.models import Count, DecimalField, F, Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from django.shortcuts import get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
 from .serializers import (
     OrderSerializer, CreateOrderSerializer,
-    UpdateOrderStatusSerializer
+    UpdateOrderStatusSerializer, SalesReportQuerySerializer,
+    OrderExportQuerySerializer, ProductOrdersQuerySerializer,
+    ProductOrderLineSerializer
 )
-# from .services import (
-
-# )
+from .archive import InvalidCursor, archive_db, decode_cursor
+from .exporters import WRITERS, export_stream
+from .filters import OrderFilter
+from .idempotency import idempotent
+from .pagination import OrderCursorPagination
+from .permissions import IsAuthenticatedCustom
+from .services import OrderPlacementError, place_order
 import logging
 
 
 logger = logging.getLogger(__name__)
 
-class IsAuthenticatedCustom:
-    """Custom permission class for order views."""
 
-    def has_permission(self, request, view):
-        return (
-            hasattr(request, 'user_id') and request.user is not None
-        )
+def money(value):
+    """Amounts go out as two-decimal strings, like the serializers' DecimalFields."""
+    return f"{value or Decimal('0.00'):.2f}"
+
 
 class OrderListView(generics.ListAPIView):
-    serializers_class = OrderSerializer
+    serializer_class = OrderSerializer
     permission_classes = [IsAuthenticatedCustom]
+    pagination_class = OrderCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = OrderFilter
 
     def get_queryset(self):
         return (
             Order.objects.filter(user_id=self.request.user_id)
+            .with_summary()
         )
 
+    def list(self, request, *args, **kwargs):
+        """History from the hot and archive databases as one list."""
+        queryset = self.get_queryset()
+        page = self.paginator.paginate_querysets([
+            self.filter_queryset(queryset),
+            self.filter_queryset(queryset.using(archive_db())),
+        ], request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
-def OrderDetailView(generics.RetrieveAPIView):
+
+class OrderDetailView(generics.RetrieveAPIView):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticatedCustom]
 
     def get_object(self):
-        return (
-            get_object_or_404(
-                Order, id=self.kwargs['pk'], user_id=self.request.user_id
+        lookup = {'id': self.kwargs['pk'], 'user_id': self.request.user_id}
+        order = Order.objects.with_summary().filter(**lookup).first()
+        if order is None:
+            order = get_object_or_404(
+                Order.objects.using(archive_db()).with_summary(), **lookup
+            )
+        return order
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticatedCustom])
+@idempotent
+def create_order(request):
+    """Place an order from the user's cart."""
+    serializer = CreateOrderSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(
+            serializer.errors, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        order = place_order(
+            user_id=request.user_id,
+            token=request.auth_token,
+            shipping_address=serializer.validated_data['shipping_address'],
+            user_email=getattr(request, 'user_email', ''),
+            user_name=getattr(request, 'user_name', ''),
+        )
+    except OrderPlacementError as e:
+        return Response(
+            {"error": e.message, **e.details}, status=e.status_code
+        )
+
+    return Response(
+        OrderSerializer(order).data, status=status.HTTP_201_CREATED
+    )
+
+
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication])
+@permission_classes([IsAdminUser])
+def sales_report(request):
+    """
+    Daily orders, revenue and units for a date range, read from the
+    rollup tables. Cancelled orders are left out unless `status` asks
+    for them; `product_id` narrows the report to one product.
+    """
+    query = SalesReportQuerySerializer(data=request.query_params)
+    if not query.is_valid():
+        return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+    params = query.validated_data
+
+    product_id = params.get('product_id')
+    if product_id is None:
+        rows = DailySales.objects.all()
+        totals = {'orders': Sum('orders'), 'revenue': Sum('revenue'), 'units': Sum('units')}
+    else:
+        rows = DailyProductSales.objects.filter(product_id=product_id)
+        totals = {'revenue': Sum('revenue'), 'units': Sum('units')}
+
+    rows = rows.filter(date__range=(params['date_from'], params['date_to']))
+    if 'status' in params:
+        rows = rows.filter(status=params['status'])
+    else:
+        rows = rows.exclude(status='cancelled')
+
+    days = list(rows.values('date').annotate(**totals).order_by('date'))
+    summary = rows.aggregate(**totals)
+    for row in [summary, *days]:
+        row['revenue'] = money(row['revenue'])
+    return Response({
+        'date_from': params['date_from'],
+        'date_to': params['date_to'],
+        'product_id': product_id,
+        'totals': summary,
+        'days': days,
+    })
+
+
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication])
+@permission_classes([IsAdminUser])
+def export_orders(request):
+    """
+    Orders created between `date_from` and `date_to` (inclusive), one
+    row per item, as NDJSON (default) or CSV with `output=ndjson|csv`.
+
+    An order's last row carries its `cursor`; pass the last one received
+    back as `cursor` to resume an interrupted export. Rows after it are
+    from an order that was cut off and is sent again in full. The body is gzipped when the client
+    sends `Accept-Encoding: gzip`.
+    """
+    query = OrderExportQuerySerializer(data=request.query_params)
+    if not query.is_valid():
+        return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+    params = query.validated_data
+
+    file_format = request.query_params.get('output', 'ndjson').lower()
+    if file_format not in WRITERS:
+        return Response({
+            "error": f"Unsupported output format, use one of: {', '.join(WRITERS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    cursor = params.get('cursor')
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    start = timezone.make_aware(datetime.combine(params['date_from'], time.min))
+    end = timezone.make_aware(datetime.combine(params['date_to'] + timedelta(days=1), time.min))
+    compress = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+    content_type, stream = export_stream(start, end, file_format, cursor, compress)
+
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response["Content-Disposition"] = (
+        f'attachment; filename="orders-{params["date_from"]}-{params["date_to"]}.{file_format}"'
+    )
+    if compress:
+        response["Content-Encoding"] = "gzip"
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+class ProductOrdersMixin:
+    """Order lines of one product over an optional date window, hot and archived."""
+
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get_window(self):
+        query = ProductOrdersQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        window = {'product_id': self.kwargs['product_id']}
+        if 'date_from' in params:
+            window['created_at__gte'] = timezone.make_aware(
+                datetime.combine(params['date_from'], time.min)
             )
-        )
\ No newline at end of file
+        if 'date_to' in params:
+            window['created_at__lt'] = timezone.make_aware(
+                datetime.combine(params['date_to'] + timedelta(days=1), time.min)
+            )
+        return window
+
+    def get_querysets(self):
+        window = self.get_window()
+        return [
+            OrderItem.objects.using(db).filter(**window)
+            for db in ('default', archive_db())
+        ]
+
+
+class ProductOrdersView(ProductOrdersMixin, generics.GenericAPIView):
+    """
+    Orders containing a product, newest first, with the quantity and
+    price of the line. Pages are keyset ranges of the
+    (product_id, created_at, id) index.
+    """
+
+    serializer_class = ProductOrderLineSerializer
+    pagination_class = OrderCursorPagination
+
+    def get(self, request, *args, **kwargs):
+        page = self.paginator.paginate_querysets([
+            queryset.select_related('order') for queryset in self.get_querysets()
+        ], request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class ProductSalesView(ProductOrdersMixin, generics.GenericAPIView):
+    """
+    Units, orders and revenue of a product per order status over the
+    window, aggregated from the index range in each store.
+    """
+
+    def get(self, request, *args, **kwargs):
+        statuses = {}
+        for queryset in self.get_querysets():
+            rows = (
+                queryset.values('order__status').order_by()
+                .annotate(
+                    units=Sum('quantity'),
+                    orders=Count('order_id', distinct=True),
+                    revenue=Sum(
+                        F('quantity') * F('price'),
+                        output_field=DecimalField(max_digits=14, decimal_places=2)
+                    ),
+                )
+            )
+            for row in rows:
+                totals = statuses.setdefault(
+                    row['order__status'],
+                    {'units': 0, 'orders': 0, 'revenue': Decimal('0.00')}
+                )
+                totals['units'] += row['units']
+                totals['orders'] += row['orders']
+                totals['revenue'] += row['revenue']
+
+        revenue = sum((totals['revenue'] for totals in statuses.values()), Decimal('0.00'))
+        for totals in statuses.values():
+            totals['revenue'] = money(totals['revenue'])
+        return Response({
+            'product_id': self.kwargs['product_id'],
+            'units': sum(totals['units'] for totals in statuses.values()),
+            'orders': sum(totals['orders'] for totals in statuses.values()),
+            'revenue': money(revenue),
+            'by_status': statuses,
+        })
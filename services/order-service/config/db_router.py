@@ -0,0 +1,16 @@
+from django.conf import settings
+
+ARCHIVED_MODELS = {"order", "orderitem"}
+
+
+class ArchiveRouter:
+    """
+    Keep the archive database to the order tables only. Archived rows are
+    always read and written with an explicit .using(), so reads and
+    writes are left to the default routing.
+    """
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == settings.ORDER_ARCHIVE_DATABASE:
+            return app_label == "orders" and model_name in ARCHIVED_MODELS
+        return None
@@ -41,7 +41,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    # "apps.products.middleware.JWTAuthenticationMiddleware"
+    "apps.orders.middleware.JWTAuthenticationMiddleware",
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -65,14 +65,21 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 
 # DATABASE
-#     
+# ÃÃ±Ã¯Ã®Ã«Ã¼Ã§Ã³Ã¥Ã¬ Ã®Ã²Ã¤Ã¥Ã«Ã¼Ã­Ã³Ã¾ ÃÃ Ã¤Ã«Ã¿ ÃªÃ®Ã°Ã§Ã¨Ã­Ã»
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR.parent.parent / 'databases' / 'order.db',
-    }
+    },
+    # Delivered and cancelled orders moved out by `manage.py archive_orders`
+    'archive': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR.parent.parent / 'databases' / 'order_archive.db',
+    },
 }
 
+DATABASE_ROUTERS = ['config.db_router.ArchiveRouter']
+
 
 # PASSWORD VALIDATION
 AUTH_PASSWORD_VALIDATORS = [
@@ -105,12 +112,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST FRAMEWORK
 REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ],
-    'DEFAULT_PERMISSION_CLASSES': [
-        'rest_framework.permissions.IsAuthenticated',
-    ],
+    # Users are resolved through user-service by JWTAuthenticationMiddleware;
+    # views that serve anyone else (staff reports) set their own permissions
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'DEFAULT_PERMISSION_CLASSES': ['apps.orders.permissions.IsAuthenticatedCustom'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
@@ -154,7 +159,7 @@ CORS_ALLOWED_ORIGINS = [
     "https://127.0.0.1:8000",
 ]
 
-# 
+# ÃÃ®Ã£Ã¨Ã°Ã®Ã¢Ã Ã­Ã¨Ã¥
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -173,7 +178,66 @@ CART_SERVICE_URL = "http://localhost:8002"
 USER_SERVICE_URL = "http://localhost:8004"
 
 
-# Redis ( Celery, , pub/sub)
+# Redis (Ã¤Ã«Ã¿ Celery, ÃªÃ½Ã¸Ã¨Ã°Ã®Ã¢Ã Ã­Ã¨Ã¿, pub/sub)
 REDIS_HOST = "localhost"
 REDIS_PORT = 6379
-REDIS_DB = 0  #    cart-service (0  product, 1  cart)
+REDIS_DB = 0  # ÃÃ²Ã¤Ã¥Ã«Ã¼Ã­Ã Ã¿ ÃÃ Ã¤Ã«Ã¿ cart-service (0 Â product, 1 Â cart)
+
+
+# Order events outbox
+EVENT_BUS_BACKEND = "apps.orders.events.RedisEventBus"
+ORDER_OUTBOX_BATCH_SIZE = 500
+ORDER_OUTBOX_INTERVAL = 1.0  # seconds between relay polls
+ORDER_OUTBOX_RETENTION_DAYS = 7
+ORDER_OUTBOX_LAG_WARNING = 30  # seconds; /health/outbox/ reports unhealthy past it
+
+
+# Order archive
+ORDER_ARCHIVE_DATABASE = "archive"
+ORDER_ARCHIVE_AFTER_DAYS = 90  # terminal orders untouched this long are archived
+ORDER_ARCHIVE_CHUNK_SIZE = 500
+
+
+# Idempotency-Key responses are replayed to retries for this long
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+IDEMPOTENCY_LOCK_TIMEOUT = 60  # seconds a request holds its key before a retry may take over
+
+
+# Order export
+ORDER_EXPORT_CHUNK_SIZE = 1000  # orders per query and lines per streamed block
+
+
+# Celery: deployments set CELERY_BROKER_URL and run a worker. Without one
+# the in-memory broker keeps local runs free of Redis; set
+# CELERY_TASK_ALWAYS_EAGER=true there to run tasks in-process instead.
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'memory://')
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'false').lower() == 'true'
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_BEAT_SCHEDULE = {
+    # Picks up orders whose post-processing was missed or gave up retrying
+    'process-pending-orders': {
+        'task': 'apps.orders.tasks.process_pending_orders',
+        'schedule': 300.0,
+    },
+}
+
+# Order post-processing
+ORDER_POST_PROCESSING_DELAY = 5  # seconds of orders coalesced into one batch
+ORDER_POST_PROCESSING_BATCH_SIZE = 200
+ORDER_POST_PROCESSING_LEASE = 300  # seconds before a started or failed order is tried again
+ORDER_POST_PROCESSING_MAX_ATTEMPTS = 5
+
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = 'orders@microshop.local'
+
+
+# User directory (cached contact details from user-service)
+SERVICE_TOKEN = os.environ.get('SERVICE_TOKEN', 'dev-service-token')
+USER_DIRECTORY_TTL = 300  # seconds
+USER_DIRECTORY_MAX_ENTRIES = 10000
+USER_DIRECTORY_BATCH_SIZE = 500  # ids per call, at most user-service's USERS_BATCH_MAX_IDS
+
+
+# Order admin changelist
+ORDER_ADMIN_COUNT_LIMIT = 10000  # rows counted at most for the paginator
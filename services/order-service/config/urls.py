@@ -14,9 +14,33 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path
+from django.urls import path, include
+from django.http import JsonResponse
+
+from apps.orders.outbox import outbox_lag
+
+
+def health_check(request):
+    return JsonResponse({
+        'status': 'healthy',
+        'service': 'order-service'
+    })
+
+
+def outbox_health(request):
+    lag = outbox_lag()
+    healthy = lag['oldest_pending_age'] <= settings.ORDER_OUTBOX_LAG_WARNING
+    return JsonResponse(
+        {'status': 'healthy' if healthy else 'lagging', **lag},
+        status=200 if healthy else 503
+    )
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('health/', health_check),
+    path('health/outbox/', outbox_health),
+    path('api/', include('apps.orders.urls')),
 ]
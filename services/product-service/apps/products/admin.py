@@ -1,5 +1,6 @@
 # apps/products/admin.py
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
 from django.utils.html import format_html
 from django import forms
 from django.db.models import Count
@@ -27,6 +28,12 @@ class CategoryAdmin(admin.ModelAdmin):
         return obj.products.count()
 
 
+class StockActionForm(ActionForm):
+    quantity = forms.IntegerField(
+        required=False, label="Кол-во (для корректировки)"
+    )
+
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     # === Отображение в списке ===
@@ -35,7 +42,7 @@ class ProductAdmin(admin.ModelAdmin):
     ]
     list_editable = ['price', 'stock_quantity', 'is_active']
     list_filter = ['is_active', 'category']
-    search_fields = ['name', 'description', 'category__name']
+    search_fields = ['sku', 'name', 'description', 'category__name']
     autocomplete_fields = ['category']
     ordering = ['-created_at']
     date_hierarchy = 'created_at'
@@ -43,7 +50,7 @@ class ProductAdmin(admin.ModelAdmin):
     # === Форма редактирования (fieldsets) ===
     fieldsets = (
         (None, {
-            "fields": ("name", "category", "price", "stock_quantity")
+            "fields": ("sku", "name", "category", "price", "stock_quantity")
         }),
         ("Контент", {
             "fields": ("description", "image_url")
@@ -84,32 +91,59 @@ class ProductAdmin(admin.ModelAdmin):
     in_stock_badge.short_description = "Наличие"
 
     # === Действия ===
-    actions = ["reserve_1", "release_1", "reserve_10", "release_10"]
+    # Каждое действие — один условный UPDATE по всем выбранным товарам
+    action_form = StockActionForm
+    actions = ["reserve_1", "release_1", "reserve_10", "release_10", "adjust_stock"]
+
+    def _adjust_stock(self, request, queryset, delta):
+        adjusted, skipped = queryset.adjust_stock(delta)
+
+        if delta < 0:
+            self.message_user(request, f"Зарезервировано по {-delta} шт. у {len(adjusted)} товар(ов)")
+        else:
+            self.message_user(request, f"Освобождено по {delta} шт. у {len(adjusted)} товар(ов)")
+
+        if skipped:
+            self.message_user(
+                request,
+                f"Недостаточно остатка у {len(skipped)} товар(ов): " + ", ".join(
+                    f"{name} (#{product_id}, {stock} шт.)"
+                    for product_id, name, stock in skipped
+                ),
+                messages.WARNING
+            )
 
     def reserve_1(self, request, queryset):
-        for product in queryset:
-            product.reserve_quantity(1)
-        self.message_user(request, f"Зарезервировано по 1 шт. у {queryset.count()} товар(ов)")
+        self._adjust_stock(request, queryset, -1)
 
     reserve_1.short_description = "📦 Зарезервировать 1 шт."
 
     def release_1(self, request, queryset):
-        for product in queryset:
-            product.release_quantity(1)
-        self.message_user(request, f"Освобождено по 1 шт. у {queryset.count()} товар(ов)")
+        self._adjust_stock(request, queryset, 1)
 
     release_1.short_description = "🔄 Освободить 1 шт."
 
     def reserve_10(self, request, queryset):
-        for product in queryset:
-            product.reserve_quantity(10)
-        self.message_user(request, f"Зарезервировано по 10 шт. у {queryset.count()} товар(ов)")
+        self._adjust_stock(request, queryset, -10)
 
     reserve_10.short_description = "📦 Зарезервировать 10 шт."
 
     def release_10(self, request, queryset):
-        for product in queryset:
-            product.release_quantity(10)
-        self.message_user(request, f"Освобождено по 10 шт. у {queryset.count()} товар(ов)")
+        self._adjust_stock(request, queryset, 10)
 
     release_10.short_description = "🔄 Освободить 10 шт."
+
+    def adjust_stock(self, request, queryset):
+        try:
+            quantity = int(request.POST.get("quantity") or 0)
+        except ValueError:
+            quantity = 0
+
+        if not quantity:
+            self.message_user(
+                request, "Укажите ненулевое количество для корректировки", messages.ERROR
+            )
+            return
+        self._adjust_stock(request, queryset, quantity)
+
+    adjust_stock.short_description = "✏️ Изменить остаток на N шт. (N < 0 — резерв)"
@@ -0,0 +1,182 @@
+import bisect
+import heapq
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text):
+    return " ".join(text.casefold().split())
+
+
+def index_keys(name):
+    """Every word-start suffix, so "pro" finds "iPhone 15 Pro"."""
+    words = normalize(name).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    """
+    Sorted array of (key, product_id) pairs over active product names.
+
+    Lookups are a binary search plus a bounded forward scan whose matches
+    are ranked, so the best suggestions win rather than the first keys
+    in sort order. The number of indexed products is capped by
+    PRODUCT_AUTOCOMPLETE_MAX_PRODUCTS.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._names = {}
+        self._lock = threading.RLock()
+        self._built_at = None
+        self._rebuilding = False
+        # Upserts and removals made while a rebuild reads the database,
+        # replayed on top of its snapshot: product_id -> (name, is_active).
+        self._pending = {}
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    def build(self, products):
+        """Replace the index with `products`, an iterable of (id, name)."""
+        max_products = settings.PRODUCT_AUTOCOMPLETE_MAX_PRODUCTS
+        names = {}
+        keys = []
+        for product_id, name in products:
+            if len(names) >= max_products:
+                break
+            names[product_id] = name
+            keys.extend((key, product_id) for key in index_keys(name))
+        keys.sort()
+
+        with self._lock:
+            self._keys = keys
+            self._names = names
+            self._built_at = time.monotonic()
+            pending, self._pending = self._pending, {}
+            for product_id, (name, is_active) in pending.items():
+                self._upsert(product_id, name, is_active)
+
+    def build_from_db(self):
+        self.build(
+            Product.objects.filter(is_active=True)
+            .order_by("-updated_at")
+            .values_list("id", "name")
+            .iterator(chunk_size=5000)
+        )
+        logger.info(f"Autocomplete index built with {len(self._names)} products")
+
+    def _remove(self, product_id):
+        name = self._names.pop(product_id, None)
+        if name is None:
+            return
+        for key in index_keys(name):
+            i = bisect.bisect_left(self._keys, (key, product_id))
+            if i < len(self._keys) and self._keys[i] == (key, product_id):
+                del self._keys[i]
+
+    def _upsert(self, product_id, name, is_active):
+        self._remove(product_id)
+        if not is_active or name is None:
+            return
+        if len(self._names) >= settings.PRODUCT_AUTOCOMPLETE_MAX_PRODUCTS:
+            return
+        self._names[product_id] = name
+        for key in index_keys(name):
+            bisect.insort(self._keys, (key, product_id))
+
+    def remove(self, product_id):
+        self.upsert(product_id, None, False)
+
+    def upsert(self, product_id, name, is_active):
+        with self._lock:
+            if self._rebuilding:
+                self._pending[product_id] = (name, is_active)
+            self._upsert(product_id, name, is_active)
+
+    @staticmethod
+    def rank(prefix, key, name):
+        """
+        Sort key of a match, best first: matches at the start of the name,
+        then whole-word matches, then shorter names.
+        """
+        position = len(normalize(name).split()) - len(key.split())
+        partial_word = len(key) > len(prefix) and key[len(prefix)] != " "
+        return position, partial_word, len(name), name.casefold()
+
+    def search(self, query, limit):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        best = {}
+        with self._lock:
+            i = bisect.bisect_left(self._keys, (prefix,))
+            end = min(i + settings.PRODUCT_AUTOCOMPLETE_SCAN_LIMIT, len(self._keys))
+            while i < end:
+                key, product_id = self._keys[i]
+                if not key.startswith(prefix):
+                    break
+                rank = self.rank(prefix, key, self._names[product_id])
+                if product_id not in best or rank < best[product_id]:
+                    best[product_id] = rank
+                i += 1
+            top = heapq.nsmallest(limit, best.items(), key=lambda match: (match[1], match[0]))
+            return [
+                {"id": product_id, "name": self._names[product_id]}
+                for product_id, _ in top
+            ]
+
+    def ensure_fresh(self):
+        """
+        Build on first use; afterwards rebuild in the background once the
+        index is older than PRODUCT_AUTOCOMPLETE_REBUILD_INTERVAL, which
+        picks up bulk writes made by other processes.
+        """
+        if not self.is_built:
+            with self._lock:
+                if not self.is_built:
+                    self.build_from_db()
+            return
+
+        age = time.monotonic() - self._built_at
+        if age < settings.PRODUCT_AUTOCOMPLETE_REBUILD_INTERVAL:
+            return
+
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+            self._pending = {}
+        threading.Thread(target=self._rebuild, daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            self.build_from_db()
+        except DatabaseError as e:
+            logger.error(f"Error rebuilding autocomplete index: {e}")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+                self._pending = {}
+            connection.close()
+
+
+product_index = PrefixIndex()
+
+
+def warm_up():
+    """Build the index when a worker starts."""
+    try:
+        product_index.build_from_db()
+    except DatabaseError as e:
+        logger.warning(f"Autocomplete index not built at startup: {e}")
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Product
+
+
+class AvailabilityCache:
+    """
+    Per-process micro-cache of (stock_quantity, is_active) by product id.
+
+    Entries live for a fraction of a second, so bursts of identical
+    availability checks for hot SKUs share one database read while stock
+    figures never drift far from the database.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, product_ids):
+        now = time.monotonic()
+        found = {}
+        missing = []
+        with self._lock:
+            for product_id in product_ids:
+                entry = self._entries.get(product_id)
+                if entry is not None and entry[0] > now:
+                    found[product_id] = entry[1]
+                else:
+                    missing.append(product_id)
+        return found, missing
+
+    def set_many(self, rows, ttl):
+        expires = time.monotonic() + ttl
+        max_entries = settings.PRODUCT_AVAILABILITY_CACHE_MAX_ENTRIES
+        with self._lock:
+            for product_id, row in rows.items():
+                self._entries.pop(product_id, None)
+                self._entries[product_id] = (expires, row)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, product_ids):
+        with self._lock:
+            for product_id in product_ids:
+                self._entries.pop(product_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+availability_cache = AvailabilityCache()
+
+
+def invalidate_on_commit(product_ids):
+    """
+    Drop cached availability once the current transaction commits.
+
+    For stock written with QuerySet.update/bulk_update, which bypass the
+    post_save signal. Other processes still serve their copy until it
+    expires after PRODUCT_AVAILABILITY_CACHE_TTL.
+    """
+    product_ids = list(product_ids)
+    transaction.on_commit(lambda: availability_cache.invalidate(product_ids))
+
+
+def get_availability(product_ids):
+    """
+    Map product id -> (stock_quantity, is_active) for the given ids.
+
+    Ids missing from the micro-cache are fetched together in one query
+    that reads only the columns needed; unknown ids are left out.
+    """
+    ttl = settings.PRODUCT_AVAILABILITY_CACHE_TTL
+    product_ids = list(dict.fromkeys(product_ids))
+
+    if ttl:
+        found, missing = availability_cache.get_many(product_ids)
+    else:
+        found, missing = {}, product_ids
+
+    if missing:
+        # Unknown ids are cached as None so repeated misses stay cheap too.
+        fetched = dict.fromkeys(missing)
+        fetched.update(
+            (product_id, (stock_quantity, is_active))
+            for product_id, stock_quantity, is_active in (
+                Product.objects.filter(id__in=missing).order_by()
+                .values_list("id", "stock_quantity", "is_active")
+            )
+        )
+        if ttl:
+            availability_cache.set_many(fetched, ttl)
+        found.update(fetched)
+
+    return {
+        product_id: row for product_id, row in found.items() if row is not None
+    }
@@ -0,0 +1,71 @@
+import base64
+import heapq
+from datetime import datetime
+
+from django.db.models import Q
+
+from .exporters import export_row
+from .models import Product, ProductTombstone
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp, object_id):
+    raw = f"{timestamp.isoformat()}|{object_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, object_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(object_id)
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def changes_since(cursor=None, limit=500):
+    """
+    Products changed and deleted after `cursor`, oldest first.
+
+    Both sources are read in (timestamp, id) order through their indexes
+    with at most limit + 1 rows each, then merged. Returns the changes,
+    the cursor to resume from and whether more changes are waiting.
+    """
+    products = Product.objects.order_by("updated_at", "id")
+    tombstones = ProductTombstone.objects.order_by("deleted_at", "product_id")
+
+    if cursor:
+        timestamp, object_id = decode_cursor(cursor)
+        products = products.filter(
+            Q(updated_at__gt=timestamp) | Q(updated_at=timestamp, id__gt=object_id)
+        )
+        tombstones = tombstones.filter(
+            Q(deleted_at__gt=timestamp) | Q(deleted_at=timestamp, product_id__gt=object_id)
+        )
+
+    merged = heapq.merge(
+        ((p.updated_at, p.id, "upsert", p) for p in products[:limit + 1]),
+        ((t.deleted_at, t.product_id, "delete", t) for t in tombstones[:limit + 1]),
+        key=lambda change: change[:2],
+    )
+
+    changes = []
+    next_cursor = cursor
+    has_more = False
+    for timestamp, object_id, op, obj in merged:
+        if len(changes) == limit:
+            has_more = True
+            break
+        if op == "upsert":
+            changes.append({"op": op, "id": object_id, "product": export_row(obj)})
+        else:
+            changes.append({
+                "op": op, "id": object_id,
+                "sku": obj.sku, "deleted_at": obj.deleted_at,
+            })
+        next_cursor = encode_cursor(timestamp, object_id)
+
+    return changes, next_cursor, has_more
@@ -1,35 +1,53 @@
-import json 
-import redis 
-import threading
 import logging
-from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .events import get_event_bus
 
 logger = logging.getLogger(__name__)
 
-def start_event_listener():
+
+def start_event_listener(bus=None):
     """
-    Redis event listener
+    Handle events from the bus until it stops; run by the consume_events
+    management command. A failing event is logged and skipped; its
+    handler's transaction is rolled back, so nothing is half applied.
+    Returns the number of events handled.
     """
-    try: 
-        redis_client = redis.Redis(
-            host=settings.REDIS_HOST, port=settings.REDIS_PORT, 
-            db=settings.REDIS_DB, decode_responses=True
-        )
-        pubsub = redis_client.pubsub()
-        pubsub.subscribe("events")
+    bus = bus or get_event_bus()
+    logger.info("Product service event listener started")
+
+    handled = 0
+    for event_data in bus.listen():
+        try:
+            handle_event(event_data)
+            handled += 1
+        except Exception:
+            logger.exception(f"Error handling event {event_data.get('event_id')}")
+    return handled
 
-        logger.info("Product service event listener started")
 
-        for message in pubsub.listen():
-            if message["type"] == "message":
-                try:
-                    event_data = json.loads(message["data"])
-                    handle_event(event_data)
-                except Exception as e:
-                    logger.error(f"Error handling event: {e}")
+HANDLED_EVENTS = ("order.created", "order.cancelled")
+
+
+def is_duplicate(event_data):
+    """
+    Record the event as processed; True if it already was. Call inside
+    the transaction that applies it, so a failed handler is retried.
+    """
+    event_id = event_data.get("event_id")
+    if event_id is None:
+        return False
+
+    from .models import ProcessedEvent
 
-    except Exception as e:
-        logger.error(f"Error starting event listener: {e}")
+    try:
+        with transaction.atomic():
+            ProcessedEvent.objects.create(
+                source=event_data["type"].split(".")[0], event_id=event_id
+            )
+    except IntegrityError:
+        return True
+    return False
 
 
 def handle_event(event_data):
@@ -38,25 +56,47 @@ def handle_event(event_data):
     """
     event_type = event_data.get("type")
     data = event_data.get("data", {})
+    if event_type not in HANDLED_EVENTS:
+        return
+
+    with transaction.atomic():
+        if is_duplicate(event_data):
+            logger.info(f"Skipping already processed {event_type} event {event_data['event_id']}")
+            return
+        apply_event(event_type, data)
+
+
+def apply_event(event_type, data):
+    """Act on one order event; handle_event makes sure it happens once."""
+    if event_type == "order.created":
+        """Keep the held stock and the basket for the recommendations job"""
+        from .recommendations import record_basket
+        from .reservations import confirm
 
-    if event_type == "order.cancelled":
+        if data.get("reservation_id"):
+            confirm(data["reservation_id"])
+        record_basket(
+            data["order_id"], [int(item["product_id"]) for item in data.get("items", [])]
+        )
+
+    elif event_type == "order.cancelled":
         """Restore the stock"""
         from .models import Product
+        from .recommendations import cancel_basket
+
+        cancel_basket(data["order_id"])
+
+        quantities = {}
+        for item in data.get("items", []):
+            product_id = int(item["product_id"])
+            quantities[product_id] = quantities.get(product_id, 0) + int(item["quantity"])
+        if not quantities:
+            return
 
-        order_items = data.get("items", [])
-        for item in order_items:
-            try:
-                product = Product.objects.get(id=item["product_id"])
-                product.release_quantity(item["quantity"])
-                logger.info(f"Released {item['quantity']} units of product {product.id}")
-            except Product.DoesNotExist:
-                logger.error(
-                    f"Product {item['product_id']} not found for cancellation event"
-                )
-
-
-if settings.DEBUG:
-    thread = threading.Thread(
-        target=start_event_listener, daemon=True
-    )
-    thread.start()
\ No newline at end of file
+        released = Product.objects.release_many(quantities)
+        logger.info(f"Released stock of {len(released)} products for cancelled order #{data['order_id']}")
+        missing = set(quantities) - {product.id for product in released}
+        if missing:
+            logger.error(
+                f"Products {sorted(missing)} not found for cancellation event"
+            )
@@ -0,0 +1,56 @@
+import json
+import logging
+
+import redis
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class RedisEventBus:
+    """Publishes events to the shared Redis `events` channel."""
+
+    channel = "events"
+
+    def __init__(self):
+        self.client = redis.Redis(
+            host=settings.REDIS_HOST, port=settings.REDIS_PORT,
+            db=settings.REDIS_DB, decode_responses=True
+        )
+
+    def publish_many(self, events):
+        """Publish a batch of events in a single pipelined round trip."""
+        pipeline = self.client.pipeline(transaction=False)
+        for event in events:
+            pipeline.publish(self.channel, json.dumps(event, cls=DjangoJSONEncoder))
+        pipeline.execute()
+
+    def listen(self):
+        """Events published by every service from now on, decoded, forever."""
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        for message in pubsub.listen():
+            try:
+                yield json.loads(message["data"])
+            except ValueError:
+                logger.error(f"Dropping undecodable event: {message['data']!r}")
+
+
+class InMemoryEventBus:
+    """Stand-in bus that keeps published events in a list, for tests and local runs."""
+
+    def __init__(self):
+        self.published = []
+
+    def publish_many(self, events):
+        self.published.extend(events)
+
+    def listen(self):
+        """Events published so far; returns once they are consumed."""
+        yield from self.published
+
+
+def get_event_bus():
+    return import_string(settings.EVENT_BUS_BACKEND)()
@@ -0,0 +1,97 @@
+import csv
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .registry import category_registry
+
+EXPORT_FIELDS = [
+    "id", "sku", "name", "description", "price",
+    "category_id", "category_slug", "category_name",
+    "stock_quantity", "image_url", "is_active",
+    "created_at", "updated_at",
+]
+
+
+def export_row(product):
+    """Flat representation of a product, category included."""
+    category = category_registry.get(product.category_id)
+    return {
+        "id": product.id,
+        "sku": product.sku,
+        "name": product.name,
+        "description": product.description,
+        "price": str(product.price),
+        "category_id": product.category_id,
+        "category_slug": category.slug if category else None,
+        "category_name": category.name if category else None,
+        "stock_quantity": product.stock_quantity,
+        "image_url": product.image_url,
+        "is_active": product.is_active,
+        "created_at": product.created_at,
+        "updated_at": product.updated_at,
+    }
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(products):
+    encoder = DjangoJSONEncoder()
+    for product in products:
+        yield encoder.encode(export_row(product)) + "\n"
+
+
+def csv_lines(products):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for product in products:
+        row = export_row(product)
+        yield writer.writerow([
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in (row[field] for field in EXPORT_FIELDS)
+        ])
+
+
+WRITERS = {
+    "ndjson": ("application/x-ndjson", ndjson_lines),
+    "csv": ("text/csv", csv_lines),
+}
+
+
+def encoded_blocks(lines, block_lines=None):
+    """Join lines into UTF-8 blocks so the server isn't flushing per row."""
+    block_lines = block_lines or settings.PRODUCT_EXPORT_CHUNK_SIZE
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) >= block_lines:
+            yield "".join(block).encode("utf-8")
+            block = []
+    if block:
+        yield "".join(block).encode("utf-8")
+
+
+def gzip_blocks(blocks):
+    """Compress a stream of byte blocks into a single gzip member."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(queryset, file_format, compress=False):
+    """Bytes of the whole export, fetched from the database in chunks."""
+    content_type, writer = WRITERS[file_format]
+    products = queryset.iterator(
+        chunk_size=settings.PRODUCT_EXPORT_CHUNK_SIZE
+    )
+    blocks = encoded_blocks(writer(products))
+    return content_type, gzip_blocks(blocks) if compress else blocks
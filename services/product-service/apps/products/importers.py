@@ -0,0 +1,220 @@
+import csv
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.fields import empty
+
+from .availability import invalidate_on_commit
+from .models import OutboxEvent, Product
+from .registry import category_registry
+from .serializers import ProductImportSerializer
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FIELDS = [
+    "name", "description", "price", "category_id",
+    "stock_quantity", "image_url", "is_active",
+]
+
+# Serializer defaults fill the fields a row leaves out, for new products
+# only; an existing product keeps whatever the row doesn't mention.
+CREATE_DEFAULTS = {
+    name: field.default
+    for name, field in ProductImportSerializer().fields.items()
+    if field.default is not empty
+}
+
+
+def read_csv(lines):
+    """Yield rows of a CSV stream with a header line."""
+    for row in csv.DictReader(lines):
+        # Empty cells count as left out, like a missing column.
+        yield {key: value for key, value in row.items() if key and value != ""}
+
+
+def read_ndjson(lines):
+    """Yield rows of a newline-delimited JSON stream, skipping blank lines."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # Reported as an invalid row instead of aborting the import.
+            yield line
+
+
+READERS = {
+    "csv": read_csv,
+    "ndjson": read_ndjson,
+}
+
+
+class ImportResult:
+    """Running totals of an import; errors are capped to keep memory flat."""
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.monotonic()
+
+    def add_error(self, row_number, error):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row_number, "errors": error})
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed
+        return round(self.rows / elapsed, 1) if elapsed else float(self.rows)
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "errors": self.errors,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "rows_per_second": self.rows_per_second,
+        }
+
+
+class ProductImporter:
+    """
+    Streaming catalog import keyed by SKU.
+
+    Rows are validated and upserted one chunk at a time: a single query
+    looks up existing SKUs, then bulk_create/bulk_update run inside one
+    transaction per chunk. Fields a row leaves out keep their stored
+    value (new products get the defaults). Rows identical to the stored
+    product are skipped, and outbox events are recorded only for tracked fields that
+    actually changed. Categories resolve through the category registry.
+    Only the current chunk is held in memory.
+    """
+
+    def __init__(self, chunk_size=None, max_errors=100, on_chunk=None):
+        self.chunk_size = chunk_size or settings.PRODUCT_IMPORT_CHUNK_SIZE
+        self.max_errors = max_errors
+        self.on_chunk = on_chunk
+
+    def run(self, rows):
+        result = ImportResult(self.max_errors)
+        chunk = []
+
+        for row_number, row in enumerate(rows, start=1):
+            result.rows += 1
+            data = self.validate(row_number, row, result)
+            if data is not None:
+                chunk.append(data)
+
+            if len(chunk) >= self.chunk_size:
+                self.flush(chunk, result)
+                chunk = []
+
+        if chunk:
+            self.flush(chunk, result)
+
+        logger.info(
+            f"Imported {result.rows} rows: {result.created} created, "
+            f"{result.updated} updated, {result.unchanged} unchanged, "
+            f"{result.failed} failed ({result.rows_per_second} rows/sec)"
+        )
+        return result
+
+    def validate(self, row_number, row, result):
+        if not isinstance(row, dict):
+            result.add_error(row_number, {"non_field_errors": ["Expected an object"]})
+            return None
+
+        serializer = ProductImportSerializer(data=row)
+        if not serializer.is_valid():
+            result.add_error(row_number, serializer.errors)
+            return None
+
+        # Only what the row supplied; defaults are applied on create.
+        data = {
+            field: value for field, value in serializer.validated_data.items()
+            if field in row
+        }
+        category = category_registry.get_by_slug(data.pop("category"))
+        if category is None:
+            result.add_error(row_number, {"category": ["Unknown category slug"]})
+            return None
+
+        data["category_id"] = category.id
+        return data
+
+    def flush(self, chunk, result):
+        # Later rows win when the same SKU appears twice in one chunk.
+        rows = {data["sku"]: data for data in chunk}
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        events = []
+
+        with transaction.atomic():
+            existing = {
+                product.sku: product
+                for product in Product.objects.filter(sku__in=list(rows))
+                .only("sku", *IMPORT_FIELDS)
+            }
+            for sku, data in rows.items():
+                product = existing.get(sku)
+                if product is None:
+                    to_create.append(Product(**{**CREATE_DEFAULTS, **data}))
+                    continue
+
+                changed = [
+                    field for field in IMPORT_FIELDS
+                    if field in data and getattr(product, field) != data[field]
+                ]
+                if not changed:
+                    # Identical rows are neither written nor announced.
+                    result.unchanged += 1
+                    continue
+
+                for field in changed:
+                    setattr(product, field, data[field])
+                product.updated_at = now
+                to_update.append(product)
+                tracked = [field for field in Product.TRACKED_FIELDS if field in changed]
+                if tracked:
+                    events.append(("product.updated", product, tracked))
+
+            Product.objects.bulk_create(to_create)
+            Product.objects.bulk_update(to_update, IMPORT_FIELDS + ["updated_at"])
+            invalidate_on_commit(product.id for product in to_update)
+            events += [
+                ("product.created", product, Product.TRACKED_FIELDS)
+                for product in to_create
+            ]
+            OutboxEvent.objects.bulk_create(
+                OutboxEvent(
+                    event_type=event_type,
+                    aggregate_id=product.id,
+                    payload=product.event_payload(changed)
+                )
+                for event_type, product, changed in events
+            )
+
+        result.created += len(to_create)
+        result.updated += len(to_update)
+
+        if self.on_chunk:
+            self.on_chunk(result)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from apps.products.models import OrderBasket, ProductPairCount, ProductRecommendation
+from apps.products.recommendations import build_recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Update \"frequently bought together\" recommendations from the order "
+        "baskets recorded since the previous run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=None, help="Baskets per batch")
+        parser.add_argument("--top-n", type=int, default=None)
+        parser.add_argument(
+            "--full", action="store_true",
+            help="Drop the stored matrix and recount every recorded basket",
+        )
+
+    def handle(self, *args, chunk_size, top_n, full, **options):
+        if full:
+            ProductPairCount.objects.all().delete()
+            ProductRecommendation.objects.all().delete()
+            OrderBasket.objects.filter(cancelled=True).delete()
+            OrderBasket.objects.update(counted=False)
+
+        def report(last_order_id, added, removed):
+            self.stdout.write(
+                f"Up to order #{last_order_id}: {added} orders added, {removed} cancelled"
+            )
+
+        orders = build_recommendations(chunk_size, top_n, on_chunk=report)
+        self.stdout.write(self.style.SUCCESS(f"Done: {orders} orders processed"))
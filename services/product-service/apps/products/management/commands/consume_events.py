@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.products.event_handlers import start_event_listener
+
+
+class Command(BaseCommand):
+    help = (
+        "Handle order events from the event bus: confirm stock holds, release "
+        "the stock of cancelled orders and record baskets for recommendations."
+    )
+
+    def handle(self, *args, **options):
+        handled = start_event_listener()
+        self.stdout.write(f"Handled {handled} events")
@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.products.importers import READERS, ProductImporter
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV or NDJSON catalog file into the products table, upserting by SKU."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or '-' for stdin")
+        parser.add_argument(
+            "--format", choices=sorted(READERS), dest="file_format",
+            help="Input format; guessed from the file extension by default",
+        )
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, path, file_format, chunk_size, **options):
+        if file_format is None:
+            suffix = Path(path).suffix.lower()
+            file_format = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}.get(suffix)
+        if file_format is None:
+            raise CommandError("Cannot guess the input format, pass --format")
+
+        def report(result):
+            self.stdout.write(
+                f"{result.rows} rows, {result.created} created, "
+                f"{result.updated} updated, {result.unchanged} unchanged, "
+                f"{result.failed} failed ({result.rows_per_second} rows/sec)"
+            )
+
+        importer = ProductImporter(chunk_size=chunk_size, on_chunk=report)
+
+        if path == "-":
+            result = importer.run(READERS[file_format](sys.stdin))
+        else:
+            try:
+                with open(path, encoding="utf-8-sig", newline="") as lines:
+                    result = importer.run(READERS[file_format](lines))
+            except OSError as e:
+                raise CommandError(f"Cannot read {path}: {e}")
+
+        for error in result.errors:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {result.rows} rows in {result.elapsed:.1f}s "
+            f"({result.rows_per_second} rows/sec), "
+            f"{result.created} created, {result.updated} updated, "
+            f"{result.unchanged} unchanged, {result.failed} failed"
+        ))
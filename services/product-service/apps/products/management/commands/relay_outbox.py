@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.products.events import get_event_bus
+from apps.products.outbox import purge_published, relay_batch
+
+
+class Command(BaseCommand):
+    help = "Publish pending product outbox events to the event bus in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--interval", type=float, default=settings.PRODUCT_OUTBOX_INTERVAL,
+            help="Seconds to wait between batches; changes within it are coalesced",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Drain the outbox and exit instead of polling forever",
+        )
+
+    def handle(self, *args, batch_size, interval, once, **options):
+        bus = get_event_bus()
+
+        while True:
+            published = relay_batch(bus, batch_size)
+            if published:
+                self.stdout.write(f"Published {published} outbox rows")
+                continue
+
+            purged = purge_published()
+            if purged:
+                self.stdout.write(f"Purged {purged} published outbox rows")
+            if once:
+                break
+            time.sleep(interval)
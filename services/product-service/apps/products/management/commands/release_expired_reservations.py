@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.products.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = "Return stock held by reservations whose order never arrived."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, batch_size, **options):
+        released = release_expired(batch_size)
+        self.stdout.write(f"Released {released} expired reservations")
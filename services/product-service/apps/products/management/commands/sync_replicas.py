@@ -0,0 +1,28 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database over the configured replica files (local setups only)."
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if not primary['ENGINE'].endswith('sqlite3'):
+            raise CommandError("Only SQLite primaries can be copied with this command")
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No replicas configured, set PRODUCT_DB_REPLICAS")
+
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"Copied primary to {alias} ({settings.DATABASES[alias]['NAME']})")
+        finally:
+            source.close()
@@ -3,6 +3,8 @@ import requests
 from django.http import JsonResponse
 from django.conf import settings
 
+from config.db_router import has_written, pin_to_primary, unpin
+
 class JWTAuthenticationMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -17,4 +19,34 @@ class JWTAuthenticationMiddleware:
                 pass
 
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route the reads of safe requests to replicas.
+
+    Unsafe requests stay on the primary. After a write, the client gets a
+    short-lived cookie that keeps its following reads on the primary too
+    (read-your-writes across requests).
+    """
+
+    cookie_name = "pin_primary"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = request.method not in ("GET", "HEAD", "OPTIONS") or \
+            self.cookie_name in request.COOKIES
+        tokens = pin_to_primary(pinned)
+        try:
+            response = self.get_response(request)
+            if has_written():
+                response.set_cookie(
+                    self.cookie_name, "1",
+                    max_age=settings.REPLICA_PIN_SECONDS, httponly=True
+                )
+            return response
+        finally:
+            unpin(tokens)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_recommendations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderBasket',
+            fields=[
+                ('order_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('product_ids', models.JSONField(default=list)),
+                ('counted', models.BooleanField(default=False)),
+                ('cancelled', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.DeleteModel(
+            name='RecommendationCheckpoint',
+        ),
+        migrations.AddIndex(
+            model_name='orderbasket',
+            index=models.Index(condition=models.Q(('counted', models.F('cancelled'))), fields=['order_id'], name='basket_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_order_baskets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistryGeneration',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.PositiveBigIntegerField(default=1)),
+            ],
+        ),
+    ]
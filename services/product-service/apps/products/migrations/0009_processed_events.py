@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_stock_reservations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessedEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50)),
+                ('event_id', models.BigIntegerField()),
+                ('processed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'event_id'), name='unique_processed_event')],
+            },
+        ),
+    ]
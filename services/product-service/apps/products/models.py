@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
 from django.utils.text import slugify
 
 
@@ -21,7 +23,210 @@ class Category(models.Model):
         return self.name
     
 
+class RegistryGeneration(models.Model):
+    """
+    Version counter of a per-process registry. It lives in the database so
+    every worker sees a bump made by any other.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name} generation {self.value}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Domain event written in the same transaction as the change it
+    describes; the relay publishes pending rows to the event bus.
+    """
+
+    event_type = models.CharField(max_length=100)
+    aggregate_id = models.BigIntegerField()
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['id'], name='outbox_pending_idx',
+                condition=models.Q(published_at__isnull=True)
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.aggregate_id}"
+
+
+class ProcessedEvent(models.Model):
+    """
+    Event from another service that was already handled. The bus
+    delivers at least once, so handlers skip ids recorded here.
+    """
+
+    source = models.CharField(max_length=50)
+    event_id = models.BigIntegerField()
+    processed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'event_id'], name='unique_processed_event'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.source} event #{self.event_id}"
+
+
+class ProductQuerySet(models.QuerySet):
+    def adjust_stock(self, delta):
+        """
+        Add `delta` units (negative to reserve) to every product in the
+        queryset with a single UPDATE.
+
+        The selection is locked and read once, and both outcomes come
+        from that read: products without enough stock for a reservation
+        are left untouched. Returns the ids of adjusted products and a
+        list of (id, name, stock_quantity) for the skipped ones.
+        """
+        from .availability import invalidate_on_commit
+
+        with transaction.atomic():
+            products = list(
+                self.select_for_update()
+                .only("id", "sku", "name", "price", "is_active", "stock_quantity")
+                .order_by("id")
+            )
+            adjusted = []
+            skipped = []
+            for product in products:
+                if delta < 0 and product.stock_quantity < -delta:
+                    skipped.append((product.id, product.name, product.stock_quantity))
+                else:
+                    adjusted.append(product)
+
+            Product.objects.filter(id__in=[product.id for product in adjusted]).update(
+                stock_quantity=F("stock_quantity") + delta,
+                updated_at=timezone.now()
+            )
+            for product in adjusted:
+                product.stock_quantity += delta
+            invalidate_on_commit(product.id for product in adjusted)
+            OutboxEvent.objects.bulk_create(
+                OutboxEvent(
+                    event_type="product.updated",
+                    aggregate_id=product.id,
+                    payload=product.event_payload(["stock_quantity"])
+                )
+                for product in adjusted
+            )
+
+        return [product.id for product in adjusted], skipped
+
+    def _by_product(self, quantities):
+        return Case(
+            *[When(id=product_id, then=Value(quantity))
+              for product_id, quantity in quantities.items()],
+            output_field=IntegerField()
+        )
+
+    def _record_stock_events(self, product_ids):
+        from .availability import invalidate_on_commit
+
+        products = list(self.filter(id__in=product_ids).order_by("id"))
+        invalidate_on_commit(product.id for product in products)
+        OutboxEvent.objects.bulk_create(
+            OutboxEvent(
+                event_type="product.updated",
+                aggregate_id=product.id,
+                payload=product.event_payload(["stock_quantity"])
+            )
+            for product in products
+        )
+        return products
+
+    def reserve_many(self, quantities):
+        """
+        Reserve {product_id: quantity} all-or-nothing with one UPDATE.
+
+        Returns (products, unavailable): the reserved products with their
+        new stock, or an empty list and the ids that could not be served,
+        in which case nothing is reserved.
+        """
+        with transaction.atomic():
+            requested = self._by_product(quantities)
+            updated = self.filter(
+                id__in=quantities, is_active=True,
+                stock_quantity__gte=requested
+            ).update(
+                stock_quantity=F("stock_quantity") - requested,
+                updated_at=timezone.now()
+            )
+            if updated == len(quantities):
+                return self._record_stock_events(quantities), []
+            transaction.set_rollback(True)
+
+        stock = dict(
+            self.filter(id__in=quantities, is_active=True)
+            .values_list("id", "stock_quantity")
+        )
+        unavailable = [
+            product_id for product_id, quantity in quantities.items()
+            if stock.get(product_id, -1) < quantity
+        ]
+        return [], unavailable or list(quantities)
+
+    def release_many(self, quantities):
+        """Return {product_id: quantity} to stock with one UPDATE."""
+        with transaction.atomic():
+            self.filter(id__in=quantities).update(
+                stock_quantity=F("stock_quantity") + self._by_product(quantities),
+                updated_at=timezone.now()
+            )
+            return self._record_stock_events(quantities)
+
+
+class StockReservation(models.Model):
+    """
+    Stock held for an order being placed, keyed by the id order-service
+    generates. It makes reserve/release retries safe and lets holds whose
+    order never arrived be reclaimed after they expire.
+    """
+
+    HELD = "held"
+    CONFIRMED = "confirmed"
+    RELEASED = "released"
+    STATUS_CHOICES = [(HELD, "Held"), (CONFIRMED, "Confirmed"), (RELEASED, "Released")]
+
+    reservation_id = models.CharField(max_length=64, primary_key=True)
+    items = models.JSONField(default=dict)  # {product_id: quantity}
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['expires_at'], name='reservation_held_idx',
+                condition=models.Q(status='held')
+            ),
+        ]
+
+    def __str__(self):
+        return f"Reservation {self.reservation_id} ({self.status})"
+
+    @property
+    def quantities(self):
+        return {int(product_id): quantity for product_id, quantity in self.items.items()}
+
+
 class Product(models.Model):
+    TRACKED_FIELDS = ("price", "is_active", "stock_quantity")
+
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     name = models.CharField(max_length=200)
     description = models.TextField()
     price = models.DecimalField(max_digits=200, decimal_places=2)
@@ -33,11 +238,60 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='product_updated_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._tracked = instance.tracked_values()
+        return instance
+
+    def tracked_values(self):
+        loaded = self.get_deferred_fields()
+        return {
+            field: getattr(self, field)
+            for field in self.TRACKED_FIELDS if field not in loaded
+        }
+
+    def event_payload(self, changed):
+        return {
+            "product_id": self.id,
+            "sku": self.sku,
+            "price": str(self.price),
+            "is_active": self.is_active,
+            "stock_quantity": self.stock_quantity,
+            "changed": list(changed),
+        }
+
+    def save(self, *args, **kwargs):
+        """Save and record price/status/stock changes in the outbox atomically."""
+        created = self._state.adding
+        previous = getattr(self, "_tracked", {})
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            changed = [
+                field for field in self.TRACKED_FIELDS
+                if created or field not in previous
+                or previous[field] != getattr(self, field)
+            ]
+            if changed:
+                OutboxEvent.objects.create(
+                    event_type="product.created" if created else "product.updated",
+                    aggregate_id=self.id,
+                    payload=self.event_payload(changed)
+                )
+
+        self._tracked = self.tracked_values()
     
     @property
     def is_in_stock(self):
@@ -54,4 +308,69 @@ class Product(models.Model):
     def release_quantity(self, quantity):
         """Освобождение товара"""
         self.stock_quantity += quantity
-        self.save()
\ No newline at end of file
+        self.save()
+
+
+class ProductTombstone(models.Model):
+    """Marker left behind by a deleted product for the change feed."""
+
+    product_id = models.BigIntegerField()
+    sku = models.CharField(max_length=64, null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'product_id'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Deleted product #{self.product_id}"
+
+
+class ProductPairCount(models.Model):
+    """Sparse co-purchase matrix: how many orders contained both products."""
+
+    product_id = models.BigIntegerField()
+    other_product_id = models.BigIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product_id', 'other_product_id'], name='unique_product_pair'
+            ),
+        ]
+
+
+class ProductRecommendation(models.Model):
+    """Precomputed top-N co-purchased products, served by primary key."""
+
+    product_id = models.BigIntegerField(primary_key=True)
+    recommended = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class OrderBasket(models.Model):
+    """
+    Products of one order, recorded from order-service's order.created
+    event. The nightly job adds a basket to the co-purchase matrix once
+    and takes it out again if the order is cancelled later.
+    """
+
+    order_id = models.BigIntegerField(primary_key=True)
+    product_ids = models.JSONField(default=list)
+    counted = models.BooleanField(default=False)
+    cancelled = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Baskets the matrix doesn't reflect yet: new ones and cancelled counted ones.
+            models.Index(
+                fields=['order_id'], name='basket_pending_idx',
+                condition=models.Q(counted=models.F('cancelled'))
+            ),
+        ]
+
+    def __str__(self):
+        return f"Basket of order #{self.order_id}"
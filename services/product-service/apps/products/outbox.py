@@ -0,0 +1,80 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .events import get_event_bus
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+def coalesce(rows):
+    """
+    Collapse a batch of outbox rows to one event per product.
+
+    The latest payload wins and the `changed` lists are merged, so a
+    product whose stock moved five times in the batch window is
+    published once with its final state.
+    """
+    events = {}
+    for row in rows:
+        event = events.pop(row.aggregate_id, None)
+        payload = dict(row.payload)
+        event_type = row.event_type
+
+        if event is not None:
+            changed = list(event["data"].get("changed", []))
+            changed += [f for f in payload.get("changed", []) if f not in changed]
+            payload["changed"] = changed
+            if event["type"] == "product.created" and event_type == "product.updated":
+                event_type = "product.created"
+
+        # Re-inserted so the batch stays ordered by each product's last change.
+        events[row.aggregate_id] = {
+            "type": event_type,
+            "event_id": row.id,
+            "occurred_at": row.created_at,
+            "data": payload,
+        }
+    return list(events.values())
+
+
+def relay_batch(bus=None, batch_size=None):
+    """
+    Publish one batch of pending outbox rows, oldest first.
+
+    Rows are marked as published only after the bus accepted the batch,
+    so a crash in between re-publishes them (at-least-once delivery).
+    Returns the number of outbox rows consumed.
+    """
+    bus = bus or get_event_bus()
+    batch_size = batch_size or settings.PRODUCT_OUTBOX_BATCH_SIZE
+
+    with transaction.atomic():
+        rows = list(
+            OutboxEvent.objects.filter(published_at__isnull=True)
+            .order_by("id")[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        events = coalesce(rows)
+        bus.publish_many(events)
+        OutboxEvent.objects.filter(
+            id__in=[row.id for row in rows]
+        ).update(published_at=timezone.now())
+
+    logger.info(f"Published {len(events)} events from {len(rows)} outbox rows")
+    return len(rows)
+
+
+def purge_published(older_than=None):
+    """Delete outbox rows published before the retention window."""
+    older_than = older_than or timedelta(days=settings.PRODUCT_OUTBOX_RETENTION_DAYS)
+    deleted, _ = OutboxEvent.objects.filter(
+        published_at__lt=timezone.now() - older_than
+    ).delete()
+    return deleted
@@ -0,0 +1,148 @@
+import logging
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import OrderBasket, ProductPairCount, ProductRecommendation
+
+logger = logging.getLogger(__name__)
+
+
+def record_basket(order_id, product_ids):
+    """Keep the products of a placed order for the next run; repeats are ignored."""
+    OrderBasket.objects.get_or_create(
+        order_id=order_id,
+        defaults={"product_ids": sorted(set(product_ids))}
+    )
+
+
+def cancel_basket(order_id):
+    """
+    Mark an order cancelled so the next run takes its pairs out of the
+    matrix. A basket not counted yet is simply never counted.
+    """
+    OrderBasket.objects.update_or_create(
+        order_id=order_id, defaults={"cancelled": True}
+    )
+
+
+def count_pairs(baskets):
+    """Co-occurrence counts for every unordered pair of products in the baskets."""
+    pairs = Counter()
+    for products in baskets:
+        pairs.update(combinations(sorted(products), 2))
+    return pairs
+
+
+def add_pair_counts(pairs):
+    """
+    Apply the counts to the stored matrix in both directions: increments
+    with one batched upsert, decrements of cancelled baskets (whose
+    pairs are always stored) with one batched UPDATE.
+    """
+    table = ProductPairCount._meta.db_table
+    added = []
+    removed = []
+    for (a, b), count in pairs.items():
+        rows = added if count > 0 else removed
+        if count:
+            rows.append((a, b, abs(count)))
+            rows.append((b, a, abs(count)))
+
+    with connection.cursor() as cursor:
+        if added:
+            cursor.executemany(
+                f"INSERT INTO {table} (product_id, other_product_id, count) "
+                f"VALUES (%s, %s, %s) "
+                f"ON CONFLICT (product_id, other_product_id) "
+                f"DO UPDATE SET count = {table}.count + excluded.count",
+                added
+            )
+        if removed:
+            cursor.executemany(
+                f"UPDATE {table} SET count = count - %s "
+                f"WHERE product_id = %s AND other_product_id = %s",
+                [(count, a, b) for a, b, count in removed]
+            )
+
+
+def refresh_recommendations(product_ids, top_n=None):
+    """Recompute the stored top-N neighbours of the given products."""
+    top_n = top_n or settings.PRODUCT_RECOMMENDATIONS_TOP_N
+    product_ids = list(product_ids)
+
+    for start in range(0, len(product_ids), 500):
+        batch = product_ids[start:start + 500]
+        neighbours = defaultdict(list)
+        rows = (
+            ProductPairCount.objects.filter(product_id__in=batch, count__gt=0)
+            .annotate(rank=Window(
+                RowNumber(),
+                partition_by=F("product_id"),
+                order_by=[F("count").desc(), F("other_product_id").asc()]
+            ))
+            .filter(rank__lte=top_n)
+            .order_by("product_id", "rank")
+            .values_list("product_id", "other_product_id", "count")
+        )
+        for product_id, other_product_id, count in rows:
+            neighbours[product_id].append([other_product_id, count])
+
+        # Products whose last pair was cancelled away get an empty list.
+        ProductRecommendation.objects.bulk_create(
+            [
+                ProductRecommendation(product_id=product_id, recommended=neighbours[product_id])
+                for product_id in batch
+            ],
+            update_conflicts=True,
+            unique_fields=["product_id"],
+            update_fields=["recommended", "updated_at"]
+        )
+
+
+def build_recommendations(chunk_size=None, top_n=None, on_chunk=None):
+    """
+    Fold the baskets recorded since the last run into the matrix and
+    refresh the recommendations of every product they touched.
+
+    New baskets are added and cancelled ones that were counted are
+    subtracted. Each chunk is counted, applied and marked in one
+    transaction, so an interrupted run resumes where it stopped.
+    """
+    chunk_size = chunk_size or settings.PRODUCT_RECOMMENDATIONS_CHUNK_SIZE
+    orders = 0
+
+    while True:
+        with transaction.atomic():
+            baskets = list(
+                OrderBasket.objects.filter(counted=F("cancelled"))
+                .order_by("order_id")[:chunk_size]
+            )
+            if not baskets:
+                break
+
+            added = [basket for basket in baskets if not basket.cancelled]
+            removed = [basket for basket in baskets if basket.cancelled]
+            pairs = count_pairs(basket.product_ids for basket in added)
+            pairs.subtract(count_pairs(basket.product_ids for basket in removed))
+            touched = {product_id for pair in pairs for product_id in pair}
+
+            add_pair_counts(pairs)
+            refresh_recommendations(touched, top_n)
+            OrderBasket.objects.filter(
+                order_id__in=[basket.order_id for basket in added]
+            ).update(counted=True)
+            OrderBasket.objects.filter(
+                order_id__in=[basket.order_id for basket in removed]
+            ).update(counted=False)
+
+        orders += len(baskets)
+        if on_chunk:
+            on_chunk(baskets[-1].order_id, len(added), len(removed))
+
+    logger.info(f"Recommendations updated from {orders} orders")
+    return orders
@@ -0,0 +1,87 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+
+from .models import Category, RegistryGeneration
+
+GENERATION_NAME = "categories"
+
+
+# The registry always reads the primary: categories loaded from a lagging
+# replica would be cached under the new generation until the next bump.
+def current_generation():
+    return RegistryGeneration.objects.using(DEFAULT_DB_ALIAS) \
+        .filter(name=GENERATION_NAME) \
+        .values_list("value", flat=True).first() or 0
+
+
+def bump_generation():
+    updated = RegistryGeneration.objects.filter(name=GENERATION_NAME) \
+        .update(value=F("value") + 1)
+    if not updated:
+        _, created = RegistryGeneration.objects.get_or_create(name=GENERATION_NAME)
+        if not created:
+            bump_generation()
+
+
+class CategoryRegistry:
+    """
+    Per-process id -> category and slug -> category maps.
+
+    Categories are loaded once and reused until the generation counter
+    in the database moves, so a change made in any worker reaches all of
+    them. The counter is bumped on every Category save/delete and checked
+    at most once per CATEGORY_REGISTRY_CHECK_INTERVAL, so lookups
+    normally cost no query.
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_slug = {}
+        self._generation = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self, force=False):
+        now = time.monotonic()
+        if not force and self._generation is not None and \
+                now - self._checked_at < settings.CATEGORY_REGISTRY_CHECK_INTERVAL:
+            return
+
+        generation = current_generation()
+        with self._lock:
+            if force or generation != self._generation:
+                categories = list(Category.objects.using(DEFAULT_DB_ALIAS))
+                self._by_id = {category.id: category for category in categories}
+                self._by_slug = {category.slug: category for category in categories}
+                self._generation = generation
+            self._checked_at = now
+
+    def get(self, category_id):
+        self._ensure_loaded()
+        category = self._by_id.get(category_id)
+        if category is None and category_id is not None:
+            # Ids come from foreign keys, so a miss means a category created
+            # by another process since the last check.
+            self._ensure_loaded(force=True)
+            category = self._by_id.get(category_id)
+        return category
+
+    def get_by_slug(self, slug):
+        self._ensure_loaded()
+        return self._by_slug.get(slug)
+
+    def all(self):
+        self._ensure_loaded()
+        return list(self._by_id.values())
+
+    def invalidate(self):
+        """Bump the shared generation and drop this process's copy."""
+        bump_generation()
+        self._generation = None
+
+
+category_registry = CategoryRegistry()
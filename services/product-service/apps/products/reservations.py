@@ -0,0 +1,100 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Product, StockReservation
+
+logger = logging.getLogger(__name__)
+
+
+def reserve(reservation_id, quantities):
+    """
+    Reserve {product_id: quantity} all-or-nothing under `reservation_id`.
+
+    Repeating a reservation returns the products it already holds
+    instead of reserving again, so the caller may retry after a timeout.
+    Returns (products, unavailable) like ProductQuerySet.reserve_many.
+    """
+    try:
+        with transaction.atomic():
+            existing = StockReservation.objects.select_for_update() \
+                .filter(reservation_id=reservation_id).first()
+            if existing is None:
+                products, unavailable = Product.objects.reserve_many(quantities)
+                if products:
+                    StockReservation.objects.create(
+                        reservation_id=reservation_id,
+                        items={str(product_id): quantity for product_id, quantity in quantities.items()},
+                        expires_at=timezone.now() + timedelta(seconds=settings.PRODUCT_RESERVATION_TTL)
+                    )
+                return products, unavailable
+    except IntegrityError:
+        # A concurrent retry created it first; ours was rolled back.
+        existing = StockReservation.objects.get(reservation_id=reservation_id)
+
+    if existing.status == StockReservation.RELEASED:
+        return [], list(quantities)
+    products = list(Product.objects.filter(id__in=existing.quantities).order_by("id"))
+    return products, []
+
+
+def release(reservation_id):
+    """
+    Give the stock held by `reservation_id` back, once.
+
+    An unknown id is recorded as released, so a reservation that arrives
+    after its own release (a retried request overtaking the original)
+    reserves nothing. Confirmed reservations belong to a placed order and
+    are left alone. Returns the released products.
+    """
+    with transaction.atomic():
+        reservation, created = StockReservation.objects.select_for_update().get_or_create(
+            reservation_id=reservation_id,
+            defaults={"status": StockReservation.RELEASED, "expires_at": timezone.now()}
+        )
+        if created or reservation.status != StockReservation.HELD:
+            return []
+
+        reservation.status = StockReservation.RELEASED
+        reservation.save(update_fields=["status"])
+        return Product.objects.release_many(reservation.quantities)
+
+
+def confirm(reservation_id):
+    """
+    Keep the stock for good once the order it was held for exists, so
+    release_expired leaves it alone. Safe to repeat; returns False only
+    when the hold is unknown or was already given back.
+    """
+    confirmed = StockReservation.objects.filter(
+        reservation_id=reservation_id, status=StockReservation.HELD
+    ).update(status=StockReservation.CONFIRMED)
+    return bool(confirmed) or StockReservation.objects.filter(
+        reservation_id=reservation_id, status=StockReservation.CONFIRMED
+    ).exists()
+
+
+def release_expired(batch_size=500):
+    """
+    Release held reservations whose order never got confirmed in time,
+    in batches. Returns the number of reservations released.
+    """
+    released = 0
+    while True:
+        ids = list(
+            StockReservation.objects.filter(
+                status=StockReservation.HELD, expires_at__lte=timezone.now()
+            ).order_by("expires_at").values_list("reservation_id", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        for reservation_id in ids:
+            if release(reservation_id):
+                released += 1
+
+    if released:
+        logger.info(f"Released {released} expired stock reservations")
+    return released
@@ -1,5 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Category, Product
+from .registry import category_registry
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -8,7 +10,7 @@ class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = [
-            "id", "name", "slug", "desription", 
+            "id", "name", "slug", "description", 
             "products_count", "created_at"
         ]
 
@@ -17,28 +19,71 @@ class CategorySerializer(serializers.ModelSerializer):
     
 
 class ProductSerializer(serializers.ModelSerializer):
-    category_name = serializers.CharField(source="category.name", read_only=True)
+    category_name = serializers.SerializerMethodField()
     is_in_stock = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = Product
         fields = [
-            "id", "name", "description", 
+            "id", "sku", "name", "description", 
             "price", "category", 
             "category_name", "stock_quantity", 
             "image_url", "is_active", 
             "is_in_stock", "created_at", "updated_at"
         ]
 
+    def get_category_name(self, obj):
+        category = category_registry.get(obj.category_id)
+        return category.name if category else None
+
 
 class ProductDetailSerializer(ProductSerializer):
-    category = CategorySerializer(read_only=True)
+    category = serializers.SerializerMethodField()
+
+    def get_category(self, obj):
+        category = category_registry.get(obj.category_id)
+        if category is None:
+            return None
+        return CategorySerializer(category, context=self.context).data
 
 
 class ProductCreateUpdateSerializer(ProductSerializer):
     class Meta:
         model = Product
         fields = [
-            "name", "description", 
+            "sku", "name", "description", 
             "price", "category", 
-            "stock_quantity", "image_url"]
\ No newline at end of file
+            "stock_quantity", "image_url"]
+
+
+class ProductImportSerializer(serializers.Serializer):
+    """A single row of a bulk catalog import; category is given by slug."""
+
+    sku = serializers.CharField(max_length=64)
+    name = serializers.CharField(max_length=200)
+    description = serializers.CharField(allow_blank=True, default="")
+    price = serializers.DecimalField(max_digits=200, decimal_places=2, min_value=0)
+    category = serializers.SlugField()
+    stock_quantity = serializers.IntegerField(min_value=0, default=0)
+    image_url = serializers.URLField(allow_blank=True, default="")
+    is_active = serializers.BooleanField(default=True)
+
+
+class AvailabilityItemSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class AvailabilityRequestSerializer(serializers.Serializer):
+    items = serializers.ListField(
+        child=AvailabilityItemSerializer(), min_length=1,
+        max_length=settings.PRODUCT_AVAILABILITY_MAX_ITEMS
+    )
+
+
+class ReservationRequestSerializer(AvailabilityRequestSerializer):
+    reservation_id = serializers.CharField(max_length=64)
+
+
+class ReservationIdSerializer(serializers.Serializer):
+    reservation_id = serializers.CharField(max_length=64)
@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .autocomplete import product_index
+from .availability import availability_cache
+from .models import Category, OutboxEvent, Product, ProductTombstone
+from .registry import category_registry
+
+
+@receiver(post_delete, sender=Product)
+def record_tombstone(sender, instance, **kwargs):
+    """Leave a tombstone and an outbox event so consumers learn about the delete."""
+    availability_cache.invalidate([instance.id])
+    if product_index.is_built:
+        product_index.remove(instance.id)
+    ProductTombstone.objects.create(product_id=instance.id, sku=instance.sku)
+    OutboxEvent.objects.create(
+        event_type="product.deleted",
+        aggregate_id=instance.id,
+        payload={"product_id": instance.id, "sku": instance.sku}
+    )
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_caches(sender, instance, **kwargs):
+    availability_cache.invalidate([instance.id])
+    if product_index.is_built:
+        product_index.upsert(instance.id, instance.name, instance.is_active)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_registry(sender, **kwargs):
+    transaction.on_commit(category_registry.invalidate)
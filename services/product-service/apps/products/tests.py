@@ -1,3 +1,634 @@
-from django.test import TestCase
+import gzip
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from config.db_router import PrimaryReplicaRouter, pin_to_primary, unpin
+
+from .autocomplete import PrefixIndex
+from .availability import availability_cache, get_availability
+from .event_handlers import handle_event
+from .events import InMemoryEventBus
+from .middleware import ReplicaRoutingMiddleware
+from .importers import ProductImporter
+from .models import Category, OutboxEvent, Product, ProductRecommendation, StockReservation
+from .outbox import relay_batch
+from .recommendations import build_recommendations
+from .registry import CategoryRegistry, category_registry
+from .reservations import release_expired
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Phones")
+        self.product = Product.objects.create(
+            name="Phone", description="", price=Decimal("100.00"),
+            category=self.category, stock_quantity=5
+        )
+
+    def test_tracked_changes_are_written_to_outbox(self):
+        self.product.name = "Renamed"
+        self.product.save()
+        self.product.reserve_quantity(2)
+
+        events = list(OutboxEvent.objects.order_by("id"))
+        self.assertEqual(
+            [e.event_type for e in events],
+            ["product.created", "product.updated"]
+        )
+        self.assertEqual(events[1].payload["changed"], ["stock_quantity"])
+        self.assertEqual(events[1].payload["stock_quantity"], 3)
+
+    def test_relay_coalesces_changes_per_product(self):
+        self.product.reserve_quantity(1)
+        self.product.price = Decimal("90.00")
+        self.product.save()
+
+        bus = InMemoryEventBus()
+        self.assertEqual(relay_batch(bus), 3)
+        self.assertEqual(relay_batch(bus), 0)
+
+        [event] = bus.published
+        self.assertEqual(event["type"], "product.created")
+        self.assertEqual(event["data"]["stock_quantity"], 4)
+        self.assertEqual(event["data"]["price"], "90.00")
+        self.assertFalse(OutboxEvent.objects.filter(published_at__isnull=True).exists())
+
+
+class AdjustStockTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Phones")
+        self.products = [
+            Product.objects.create(
+                name=f"Phone {stock}", description="", price=Decimal("1.00"),
+                category=category, stock_quantity=stock
+            )
+            for stock in (0, 5, 20)
+        ]
+
+    def test_reservation_skips_products_without_stock(self):
+        queryset = Product.objects.filter(id__in=[p.id for p in self.products])
+
+        # savepoint, locking SELECT, UPDATE, outbox INSERT, release
+        with self.assertNumQueries(5):
+            adjusted, skipped = queryset.adjust_stock(-10)
+
+        self.assertEqual(adjusted, [self.products[2].id])
+        self.assertEqual(
+            [product_id for product_id, _, _ in skipped],
+            [self.products[0].id, self.products[1].id]
+        )
+        self.assertEqual(
+            list(queryset.order_by("id").values_list("stock_quantity", flat=True)),
+            [0, 5, 10]
+        )
+
+    def test_outcome_comes_from_the_locked_selection(self):
+        # The filter no longer matches the adjusted rows after the UPDATE.
+        queryset = Product.objects.filter(stock_quantity__gte=5)
+
+        adjusted, skipped = queryset.adjust_stock(-5)
+
+        self.assertEqual(adjusted, [self.products[1].id, self.products[2].id])
+        self.assertEqual(skipped, [])
+        self.assertEqual(
+            sorted(OutboxEvent.objects.filter(payload__changed=["stock_quantity"])
+                   .values_list("payload__stock_quantity", flat=True)),
+            [0, 15]
+        )
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="ann"))
+        self.phones = Category.objects.create(name="Phones")
+        self.books = Category.objects.create(name="Books")
+        for price, stock in (("40.00", 0), ("140.00", 2), ("640.00", 1)):
+            Product.objects.create(
+                name="Phone", description="", price=Decimal(price),
+                category=self.phones, stock_quantity=stock
+            )
+        Product.objects.create(
+            name="Novel", description="", price=Decimal("10.00"),
+            category=self.books, stock_quantity=3
+        )
+        # Categories are served by the registry; load them up front.
+        category_registry.invalidate()
+        category_registry.all()
+
+    def test_counts_follow_the_list_filters(self):
+        response = self.client.get("/api/products/facets/?min_price=20")
+
+        facets = response.json()
+        self.assertEqual((facets["total"], facets["in_stock"]), (3, 2))
+        self.assertEqual(
+            [bucket["count"] for bucket in facets["price_ranges"]],
+            [1, 0, 1, 0, 1, 0]
+        )
+        self.assertEqual(
+            [(row["slug"], row["count"]) for row in facets["categories"]],
+            [("phones", 3)]
+        )
+
+    def test_equivalent_filters_share_a_cache_entry(self):
+        with self.assertNumQueries(2):
+            first = self.client.get("/api/products/facets/?in_stock=true&min_price=20")
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/products/facets/?min_price=20%20&in_stock=TRUE&page=2")
+
+        self.assertEqual(first.json(), second.json())
+        with self.assertNumQueries(2):
+            self.client.get("/api/products/facets/?min_price=30")
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        category_registry.invalidate()
+        self.phones = Category.objects.create(name="Phones")
+        self.product = Product.objects.create(
+            sku="A1", name="Alpha", description="", price=Decimal("10.00"),
+            category=self.phones, stock_quantity=3
+        )
+        OutboxEvent.objects.all().delete()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create(username="admin", is_staff=True)
+        )
+
+    def post(self, body):
+        return self.client.post(
+            "/api/products/import/", data=body, content_type="text/csv"
+        )
+
+    def test_rows_are_created_updated_or_reported(self):
+        response = self.post(
+            "sku,name,price,category,stock_quantity\n"
+            "A1,Alpha,12.50,phones,3\n"
+            "B1,Beta,5,phones,\n"
+            "C1,Bad price,x,phones,1\n"
+            "D1,Bad category,1,nope,1\n"
+        )
+
+        result = response.json()
+        self.assertEqual(
+            [result[key] for key in ("rows", "created", "updated", "unchanged", "failed")],
+            [4, 1, 1, 0, 2]
+        )
+        self.assertEqual([error["row"] for error in result["errors"]], [3, 4])
+        self.assertEqual(Product.objects.get(sku="A1").price, Decimal("12.50"))
+        self.assertEqual(Product.objects.get(sku="B1").stock_quantity, 0)
+        self.assertEqual(
+            sorted(OutboxEvent.objects.values_list("event_type", "payload__changed")),
+            [("product.created", ["price", "is_active", "stock_quantity"]),
+             ("product.updated", ["price"])]
+        )
+
+    def test_unchanged_rows_are_not_written_or_announced(self):
+        updated_at = self.product.updated_at
+
+        response = self.post("sku,name,price,category,stock_quantity\nA1,Alpha,10,phones,3\n")
+
+        self.assertEqual(response.json()["unchanged"], 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.updated_at, updated_at)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_partial_rows_update_only_the_supplied_fields(self):
+        Product.objects.filter(id=self.product.id).update(
+            description="Flagship", stock_quantity=50, is_active=False
+        )
+
+        response = self.post(
+            "sku,name,price,category,stock_quantity,description\n"
+            "A1,Alpha,11,phones,,\n"
+        )
+
+        self.assertEqual(response.json()["updated"], 1)
+        self.product.refresh_from_db()
+        self.assertEqual(
+            (self.product.price, self.product.description,
+             self.product.stock_quantity, self.product.is_active),
+            (Decimal("11.00"), "Flagship", 50, False)
+        )
+
+        ProductImporter().run([{"sku": "A1", "name": "Alpha", "price": "11", "category": "phones"}])
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock_quantity, self.product.is_active), (50, False))
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(User.objects.create(username="ann"))
+
+        self.assertEqual(self.post("sku,name,price,category\n").status_code, 403)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        category_registry.invalidate()
+        phones = Category.objects.create(name="Phones")
+        books = Category.objects.create(name="Books")
+        self.phone = Product.objects.create(
+            sku="P1", name="Phone", description="", price=Decimal("100.00"),
+            category=phones, stock_quantity=2
+        )
+        Product.objects.create(
+            sku="B1", name="Novel, paperback", description="", price=Decimal("9.99"),
+            category=books
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="ann"))
+
+    def test_ndjson_export_applies_list_filters(self):
+        response = self.client.get("/api/products/export/?category_slug=phones")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        [row] = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(row["id"], self.phone.id)
+        self.assertEqual((row["category_slug"], row["price"]), ("phones", "100.00"))
+
+    def test_csv_export_is_gzipped_on_request(self):
+        response = self.client.get("/api/products/export/?output=csv", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        lines = gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["id", "sku", "name"])
+        self.assertEqual(len(lines), 3)
+        self.assertIn('"Novel, paperback"', lines[2])
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(self.client.get("/api/products/export/?output=xml").status_code, 400)
+
+
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Phones")
+        self.products = [
+            Product.objects.create(
+                sku=f"P{number}", name=f"Phone {number}", description="",
+                price=Decimal("1.00"), category=category
+            )
+            for number in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="ann"))
+
+    def poll(self, cursor=None, limit=None):
+        params = {key: value for key, value in (("cursor", cursor), ("limit", limit)) if value}
+        return self.client.get("/api/products/changes/", params).json()
+
+    def test_cursor_resumes_after_updates_and_deletes(self):
+        first = self.poll(limit=2)
+        self.assertEqual([change["id"] for change in first["changes"]],
+                         [product.id for product in self.products[:2]])
+        self.assertTrue(first["has_more"])
+
+        rest = self.poll(first["next_cursor"])
+        self.assertEqual([change["id"] for change in rest["changes"]], [self.products[2].id])
+        self.assertFalse(rest["has_more"])
+
+        updated, deleted = self.products[0], self.products[1]
+        updated.price = Decimal("2.00")
+        updated.save()
+        deleted_id = deleted.id
+        deleted.delete()
+
+        delta = self.poll(rest["next_cursor"])
+        self.assertEqual(
+            [(change["op"], change["id"]) for change in delta["changes"]],
+            [("upsert", updated.id), ("delete", deleted_id)]
+        )
+        self.assertEqual(delta["changes"][0]["product"]["price"], "2.00")
+        self.assertEqual(delta["changes"][1]["sku"], "P1")
+        self.assertEqual(self.poll(delta["next_cursor"])["changes"], [])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get("/api/products/changes/?cursor=zz")
+
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(PRODUCT_AVAILABILITY_CACHE_TTL=60)
+class AvailabilityCacheTests(TestCase):
+    def setUp(self):
+        availability_cache.clear()
+        category_registry.invalidate()
+        category = Category.objects.create(name="Phones")
+        self.product = Product.objects.create(
+            sku="P1", name="Phone", description="", price=Decimal("1.00"),
+            category=category, stock_quantity=5
+        )
+        self.assertEqual(get_availability([self.product.id]), {self.product.id: (5, True)})
+
+    def assertStock(self, stock_quantity):
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                get_availability([self.product.id])[self.product.id][0], stock_quantity
+            )
+
+    def test_hits_are_served_from_the_cache(self):
+        with self.assertNumQueries(0):
+            get_availability([self.product.id])
+
+    def test_set_based_stock_writes_invalidate(self):
+        queryset = Product.objects.filter(id=self.product.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            queryset.adjust_stock(-1)
+        self.assertStock(4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.reserve_many({self.product.id: 2})
+        self.assertStock(2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.release_many({self.product.id: 3})
+        self.assertStock(5)
+
+    def test_import_invalidates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductImporter().run([{
+                "sku": "P1", "name": "Phone", "price": "1.00",
+                "category": "phones", "stock_quantity": 9,
+            }])
+
+        self.assertStock(9)
+
+
+@override_settings(SERVICE_TOKEN="secret")
+class ReservationTests(TestCase):
+    def setUp(self):
+        availability_cache.clear()
+        category = Category.objects.create(name="Phones")
+        self.product = Product.objects.create(
+            sku="P1", name="Phone", description="", price=Decimal("10.00"),
+            category=category, stock_quantity=5
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_X_SERVICE_TOKEN="secret")
+
+    def reserve(self, reservation_id, quantity=2):
+        return self.client.post("/api/products/reserve/", {
+            "reservation_id": reservation_id,
+            "items": [{"product_id": self.product.id, "quantity": quantity}],
+        }, format="json")
+
+    def release(self, reservation_id):
+        return self.client.post(
+            "/api/products/release/", {"reservation_id": reservation_id}, format="json"
+        )
+
+    def stock(self):
+        self.product.refresh_from_db()
+        return self.product.stock_quantity
+
+    def test_internal_endpoints_need_the_service_token(self):
+        client = APIClient()
+        self.assertEqual(client.post("/api/products/reserve/", {}, format="json").status_code, 403)
+        self.assertEqual(client.post("/api/products/release/", {}, format="json").status_code, 403)
+        self.assertEqual(client.post("/api/products/confirm/", {}, format="json").status_code, 403)
+        self.assertEqual(client.post("/api/products/availability/", {}, format="json").status_code, 401)
+
+        response = self.client.post("/api/products/availability/", {
+            "items": [{"product_id": self.product.id, "quantity": 2}],
+        }, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["all_available"])
+
+    def test_retried_reservation_holds_stock_once(self):
+        response = self.reserve("r-1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["items"][0]["price"], "10.00")
+
+        self.assertEqual(self.reserve("r-1").status_code, 200)
+        self.assertEqual(self.stock(), 3)
+
+        self.assertEqual(self.reserve("r-2", quantity=4).status_code, 409)
+        self.assertEqual(self.stock(), 3)
+
+    def test_release_returns_stock_once(self):
+        self.reserve("r-1")
+
+        self.assertEqual(self.release("r-1").status_code, 200)
+        self.release("r-1")
+        self.assertEqual(self.stock(), 5)
+        self.assertEqual(self.reserve("r-1").status_code, 409)
+
+    def test_release_before_reserve_refuses_the_late_reservation(self):
+        self.release("r-1")
+
+        self.assertEqual(self.reserve("r-1").status_code, 409)
+        self.assertEqual(self.stock(), 5)
+
+    def confirm(self, reservation_id):
+        return self.client.post(
+            "/api/products/confirm/", {"reservation_id": reservation_id}, format="json"
+        )
+
+    def test_expired_holds_are_reclaimed_unless_confirmed(self):
+        self.reserve("r-1")
+        self.reserve("r-2", quantity=1)
+        self.assertEqual(self.confirm("r-2").status_code, 200)
+        self.assertEqual(self.confirm("r-2").status_code, 200)
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(release_expired(), 1)
+        self.assertEqual(self.stock(), 4)
+        self.assertEqual(
+            StockReservation.objects.get(reservation_id="r-2").status, StockReservation.CONFIRMED
+        )
+        self.assertEqual(self.confirm("r-1").status_code, 409)
+
+
+class EventHandlerTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Phones")
+        self.product = Product.objects.create(
+            sku="P1", name="Phone", description="", price=Decimal("1.00"),
+            category=category, stock_quantity=5
+        )
+
+    def cancelled(self, event_id):
+        return {"type": "order.cancelled", "event_id": event_id, "data": {
+            "order_id": 1, "items": [{"product_id": self.product.id, "quantity": 2}],
+        }}
+
+    def test_redelivered_cancellation_releases_stock_once(self):
+        handle_event(self.cancelled(10))
+        handle_event(self.cancelled(10))
+        handle_event(self.cancelled(11))
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 9)
+
+    def test_failed_event_is_not_recorded(self):
+        with mock.patch.object(Product.objects, "release_many", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                handle_event(self.cancelled(10))
+
+        handle_event(self.cancelled(10))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 7)
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.build([
+            (1, "Pro phone"), (2, "Phonetic book"), (3, "Phone case"), (4, "iPhone 15"),
+        ])
+
+    def names(self, query, limit=10):
+        return [match["name"] for match in self.index.search(query, limit)]
+
+    def test_matches_are_ranked_before_the_limit(self):
+        self.assertEqual(self.names("pho", limit=1), ["Phone case"])
+        self.assertEqual(self.names("PHO"), ["Phone case", "Phonetic book", "Pro phone"])
+        self.assertEqual(self.names("phone"), ["Phone case", "Phonetic book", "Pro phone"])
+        self.assertEqual(self.names("15"), ["iPhone 15"])
+
+    def test_upserts_during_a_rebuild_survive_the_swap(self):
+        self.index._rebuilding = True
+        self.index.upsert(5, "Phone charger", True)
+        self.index.remove(3)
+
+        # The rebuild read its snapshot before either change.
+        self.index.build([(1, "Pro phone"), (3, "Phone case")])
+
+        self.assertEqual(self.names("phone"), ["Phone charger", "Pro phone"])
+
+
+class RecommendationTests(TestCase):
+    def order_event(self, event_type, order_id, product_ids):
+        handle_event({"type": event_type, "data": {
+            "order_id": order_id,
+            "items": [{"product_id": product_id, "quantity": 1} for product_id in product_ids],
+        }})
+
+    def recommended(self, product_id):
+        return ProductRecommendation.objects.get(product_id=product_id).recommended
+
+    def test_consume_events_command_feeds_the_job(self):
+        bus = InMemoryEventBus()
+        bus.publish_many([
+            {"type": "order.created", "event_id": 1, "data": {
+                "order_id": 1, "items": [{"product_id": 1, "quantity": 1}, {"product_id": 2, "quantity": 1}],
+            }},
+            {"type": "product.updated", "event_id": 1, "data": {"product_id": 1}},
+            {"type": "order.created", "event_id": 1, "data": {
+                "order_id": 1, "items": [{"product_id": 1, "quantity": 1}, {"product_id": 2, "quantity": 1}],
+            }},
+        ])
+        out = StringIO()
+        with mock.patch("apps.products.event_handlers.get_event_bus", return_value=bus):
+            call_command("consume_events", stdout=out)
+
+        self.assertIn("Handled 3 events", out.getvalue())
+        self.assertEqual(build_recommendations(), 1)
+        self.assertEqual(self.recommended(1), [[2, 1]])
+
+    def test_baskets_from_order_events_are_counted_once(self):
+        self.order_event("order.created", 1, [1, 2, 3])
+        self.order_event("order.created", 2, [1, 2])
+        self.order_event("order.created", 2, [1, 2])
+
+        self.assertEqual(build_recommendations(top_n=2), 2)
+        self.assertEqual(self.recommended(1), [[2, 2], [3, 1]])
+        self.assertEqual(build_recommendations(), 0)
+
+    def test_cancelled_orders_are_subtracted(self):
+        self.order_event("order.created", 1, [1, 2])
+        self.order_event("order.created", 2, [1, 3])
+        build_recommendations()
+
+        self.order_event("order.cancelled", 1, [1, 2])
+        self.order_event("order.created", 3, [4, 5])
+        self.order_event("order.cancelled", 3, [4, 5])
+        build_recommendations()
+
+        self.assertEqual(self.recommended(1), [[3, 1]])
+        self.assertEqual(self.recommended(2), [])
+        self.assertFalse(ProductRecommendation.objects.filter(product_id=4).exists())
+
+
+@override_settings(CATEGORY_REGISTRY_CHECK_INTERVAL=0)
+class CategoryRegistryTests(TestCase):
+    def test_invalidation_reaches_other_processes(self):
+        phones = Category.objects.create(name="Phones")
+        # One registry per worker process; they share only the database.
+        worker_a, worker_b = CategoryRegistry(), CategoryRegistry()
+        self.assertEqual(worker_b.get_by_slug("phones"), phones)
+
+        Category.objects.filter(id=phones.id).update(slug="mobiles")
+        self.assertEqual(worker_b.get_by_slug("phones"), phones)
+        worker_a.invalidate()
+
+        self.assertIsNone(worker_b.get_by_slug("phones"))
+        self.assertEqual(worker_b.get_by_slug("mobiles").id, phones.id)
+
+    def test_unchanged_generation_costs_one_query(self):
+        Category.objects.create(name="Phones")
+        registry = CategoryRegistry()
+        registry.all()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(registry.get_by_slug("phones").name, "Phones")
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class ReplicaRoutingTests(SimpleTestCase):
+    router = PrimaryReplicaRouter()
+
+    def test_reads_outside_a_request_use_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Product), "default")
+
+    def test_writes_pin_only_their_unit_of_work(self):
+        tokens = pin_to_primary(False)
+        try:
+            self.assertEqual(self.router.db_for_read(Product), "replica_1")
+            self.assertEqual(self.router.db_for_write(Product), "default")
+            self.assertEqual(self.router.db_for_read(Product), "default")
+        finally:
+            unpin(tokens)
+
+        tokens = pin_to_primary(False)
+        try:
+            self.assertEqual(self.router.db_for_read(Product), "replica_1")
+        finally:
+            unpin(tokens)
+
+    def run_request(self, method, write=False, cookies=None):
+        routed = []
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Product)
+            routed.append(self.router.db_for_read(Product))
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)("/api/products/")
+        request.COOKIES.update(cookies or {})
+        response = ReplicaRoutingMiddleware(view)(request)
+        return routed[0], response
+
+    def test_middleware_routes_safe_requests_to_replicas(self):
+        self.assertEqual(self.run_request("get")[0], "replica_1")
+        self.assertEqual(self.run_request("post")[0], "default")
+
+    def test_a_write_keeps_the_client_on_the_primary(self):
+        _, response = self.run_request("post", write=True)
+        self.assertIn("pin_primary", response.cookies)
+
+        routed, _ = self.run_request("get", cookies={"pin_primary": "1"})
+        self.assertEqual(routed, "default")
+        self.assertEqual(self.router.db_for_read(Product), "default")
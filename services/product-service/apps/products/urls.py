@@ -27,6 +27,31 @@ urlpatterns = [
         views.ProductListView.as_view(),
         name="product-list"
     ),
+    path(
+        "products/import/",
+        views.import_products,
+        name="product-import"
+    ),
+    path(
+        "products/export/",
+        views.ProductExportView.as_view(),
+        name="product-export"
+    ),
+    path(
+        "products/changes/",
+        views.product_changes,
+        name="product-changes"
+    ),
+    path(
+        "products/autocomplete/",
+        views.autocomplete_products,
+        name="product-autocomplete"
+    ),
+    path(
+        "products/facets/",
+        views.ProductFacetsView.as_view(),
+        name="product-facets"
+    ),
     path(
         "products/<int:pk>/",
         views.ProductDetailView.as_view(),
@@ -46,6 +71,31 @@ urlpatterns = [
         views.release_product,
         name="product-release"
     ),
+    path(
+        "products/reserve/",
+        views.reserve_products,
+        name="product-reserve-batch"
+    ),
+    path(
+        "products/release/",
+        views.release_products,
+        name="product-release-batch"
+    ),
+    path(
+        "products/confirm/",
+        views.confirm_reservation,
+        name="product-reservation-confirm"
+    ),
+    path(
+        "products/availability/",
+        views.check_availability_batch,
+        name="product-availability-batch"
+    ),
+    path(
+        "products/<int:product_id>/recommendations/",
+        views.product_recommendations,
+        name="product-recommendations"
+    ),
     path(
         "products/<int:product_id>/availability/",
         views.check_availability,
@@ -1,16 +1,43 @@
+import hashlib
+import hmac
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
 from rest_framework import generics, filters, status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import BasePermission, IsAdminUser, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
-from .models import Category, Product
+from django.db.models import Count, Q
+from .autocomplete import product_index
+from .availability import get_availability
+from .changes import InvalidCursor, changes_since
+from .exporters import WRITERS, export_stream
+from .importers import READERS, ProductImporter
+from .models import Category, Product, ProductRecommendation
+from . import reservations
+from .registry import category_registry
 from .serializers import (
     CategorySerializer, ProductSerializer,
-    ProductDetailSerializer, ProductCreateUpdateSerializer
+    ProductDetailSerializer, ProductCreateUpdateSerializer,
+    AvailabilityRequestSerializer, ReservationRequestSerializer,
+    ReservationIdSerializer
 )
 
 
+class HasServiceToken(BasePermission):
+    """Calls from other services, identified by the shared X-Service-Token."""
+
+    def has_permission(self, request, view):
+        token = request.headers.get("X-Service-Token", "")
+        return bool(settings.SERVICE_TOKEN) and \
+            hmac.compare_digest(token, settings.SERVICE_TOKEN)
+
+
 class CategoryListView(generics.ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -23,20 +50,41 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CategorySerializer
     lookup_field = 'slug'
 
+    def get_object(self):
+        # Reads come from the registry; writes need a fresh row.
+        if self.request.method != 'GET':
+            return super().get_object()
+
+        category = category_registry.get_by_slug(self.kwargs['slug'])
+        if category is None:
+            raise Http404
+        self.check_object_permissions(self.request, category)
+        return category
+
+
+class ProductFilterMixin:
+    """Filters shared by the product list and everything derived from it."""
 
-class ProductListView(generics.ListCreateAPIView):
     queryset = Product.objects.all()
-    serializer_class = ProductSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, 
                        filters.OrderingFilter]
     filterset_fields = ['category', 'is_active']
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'price', "created_at"]
     ordering = ['-created_at']
+    filter_params = [
+        'category', 'category_slug', 'is_active', 'search',
+        'min_price', 'max_price', 'in_stock'
+    ]
 
     def get_queryset(self):
         queryset = super().get_queryset()
 
+        category_slug = self.request.query_params.get('category_slug')
+        if category_slug:
+            category = category_registry.get_by_slug(category_slug)
+            queryset = queryset.filter(category_id=category.id if category else None)
+
         min_price = self.request.query_params.get('min_price')
         max_price = self.request.query_params.get('max_price')
 
@@ -50,13 +98,125 @@ class ProductListView(generics.ListCreateAPIView):
             queryset = queryset.filter(stock_quantity__gt=0)
 
         return queryset
-    
+
+    def get_filter_key(self):
+        """Normalized representation of the filters applied to the request."""
+        params = sorted(
+            (name, self.request.query_params.get(name).strip().lower())
+            for name in self.filter_params
+            if self.request.query_params.get(name, '').strip()
+        )
+        return urlencode(params)
+
+
+class ProductListView(ProductFilterMixin, generics.ListCreateAPIView):
+    serializer_class = ProductSerializer
+
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return ProductCreateUpdateSerializer
         return ProductSerializer
     
 
+class ProductFacetsView(ProductFilterMixin, generics.GenericAPIView):
+    """
+    Facet counts for the storefront filter sidebar.
+
+    Accepts the same filters as ProductListView and answers with two
+    aggregate queries: one for totals, stock and price buckets, one
+    grouped by category.
+    """
+
+    def get(self, request, *args, **kwargs):
+        timeout = settings.PRODUCT_FACETS_CACHE_TIMEOUT
+        cache_key = "product-facets:" + hashlib.md5(
+            self.get_filter_key().encode()
+        ).hexdigest()
+
+        if timeout:
+            facets = cache.get(cache_key)
+            if facets is not None:
+                return Response(facets)
+
+        facets = self.compute_facets(
+            self.filter_queryset(self.get_queryset()).order_by()
+        )
+        if timeout:
+            cache.set(cache_key, facets, timeout)
+        return Response(facets)
+
+    def compute_facets(self, queryset):
+        edges = settings.PRODUCT_FACET_PRICE_BUCKETS
+        buckets = []
+        aggregates = {
+            "total": Count("id"),
+            "in_stock": Count("id", filter=Q(stock_quantity__gt=0)),
+        }
+        for index, lower in enumerate(edges):
+            upper = edges[index + 1] if index + 1 < len(edges) else None
+            condition = Q(price__gte=lower)
+            if upper is not None:
+                condition &= Q(price__lt=upper)
+            aggregates[f"price_{index}"] = Count("id", filter=condition)
+            buckets.append((f"price_{index}", lower, upper))
+
+        counts = queryset.aggregate(**aggregates)
+        categories = (
+            queryset.values("category_id")
+            .annotate(count=Count("id"))
+            .order_by("-count", "category_id")
+        )
+
+        return {
+            "total": counts["total"],
+            "in_stock": counts["in_stock"],
+            "price_ranges": [
+                {"min": lower, "max": upper, "count": counts[key]}
+                for key, lower, upper in buckets
+            ],
+            "categories": [
+                {
+                    "id": row["category_id"],
+                    "name": category.name if category else None,
+                    "slug": category.slug if category else None,
+                    "count": row["count"],
+                }
+                for row, category in (
+                    (row, category_registry.get(row["category_id"]))
+                    for row in categories
+                )
+            ],
+        }
+
+
+class ProductExportView(ProductFilterMixin, generics.GenericAPIView):
+    """
+    Full catalog export as NDJSON (default) or CSV, streamed row by row.
+
+    Takes the list filters plus `output=ndjson|csv`; the body is gzipped
+    when the client sends `Accept-Encoding: gzip`.
+    """
+
+    def get(self, request, *args, **kwargs):
+        file_format = request.query_params.get("output", "ndjson").lower()
+        if file_format not in WRITERS:
+            return Response({
+                "success": False,
+                "message": f"Unsupported output format, use one of: {', '.join(WRITERS)}"
+            }, status.HTTP_400_BAD_REQUEST)
+
+        compress = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+        queryset = self.filter_queryset(self.get_queryset()).order_by("id")
+        content_type, stream = export_stream(queryset, file_format, compress)
+
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="products.{file_format}"'
+        if compress:
+            response["Content-Encoding"] = "gzip"
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+
 class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Product.objects.all()
 
@@ -66,6 +226,42 @@ class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
         return ProductDetailSerializer
     
 
+@api_view(['GET'])
+def product_changes(request):
+    """
+    Incremental change feed: products updated or deleted since `cursor`.
+
+    Consumers start without a cursor, then pass back `next_cursor` on
+    every poll to receive only the delta.
+    """
+    try:
+        limit = min(
+            int(request.query_params.get('limit', settings.PRODUCT_CHANGES_PAGE_SIZE)),
+            settings.PRODUCT_CHANGES_MAX_PAGE_SIZE
+        )
+        if limit < 1:
+            raise ValueError(limit)
+        changes, next_cursor, has_more = changes_since(
+            request.query_params.get('cursor'), limit
+        )
+    except InvalidCursor as e:
+        return Response({
+            "success": False,
+            "message": str(e)
+        }, status.HTTP_400_BAD_REQUEST)
+    except ValueError:
+        return Response({
+            "success": False,
+            "message": "limit must be a positive integer"
+        }, status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        "changes": changes,
+        "next_cursor": next_cursor,
+        "has_more": has_more
+    })
+
+
 @api_view(['POST'])
 def reserve_product(request, product_id):
     try:
@@ -131,4 +327,225 @@ def check_availability(request, product_id):
         return Response({
             "success": False,
             "message": "Product not found"
-        }, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        }, status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['POST'])
+@permission_classes([HasServiceToken | IsAuthenticated])
+def check_availability_batch(request):
+    """
+    Availability of many cart lines at once.
+
+    Body: {"items": [{"product_id": 1, "quantity": 2}, ...]}. All products
+    are read with a single query of id/stock_quantity/is_active.
+    """
+    serializer = AvailabilityRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    items = serializer.validated_data["items"]
+    stock = get_availability(item["product_id"] for item in items)
+
+    results = []
+    for item in items:
+        product_id, quantity = item["product_id"], item["quantity"]
+        stock_quantity, is_active = stock.get(product_id, (0, False))
+        results.append({
+            "product_id": product_id,
+            "found": product_id in stock,
+            "is_active": is_active,
+            "available": is_active and stock_quantity >= quantity,
+            "stock_quantity": stock_quantity,
+            "requested_quantity": quantity
+        })
+
+    return Response({
+        "all_available": all(result["available"] for result in results),
+        "items": results
+    })
+
+
+@api_view(['GET'])
+def autocomplete_products(request):
+    """Search-as-you-type suggestions from the in-process prefix index."""
+    query = request.query_params.get('q', '')
+    try:
+        limit = min(
+            int(request.query_params.get('limit', settings.PRODUCT_AUTOCOMPLETE_LIMIT)),
+            settings.PRODUCT_AUTOCOMPLETE_MAX_LIMIT
+        )
+    except ValueError:
+        limit = settings.PRODUCT_AUTOCOMPLETE_LIMIT
+
+    product_index.ensure_fresh()
+    return Response({
+        "query": query,
+        "suggestions": product_index.search(query, max(limit, 1))
+    })
+
+
+@api_view(['GET'])
+def product_recommendations(request, product_id):
+    """
+    Precomputed "frequently bought together" products, read by primary key.
+
+    With `expand=true` the active recommended products are loaded in one
+    extra query and returned with their name, price and image. The lists
+    are rebuilt nightly, so reading them from a lagging replica is fine.
+    """
+    recommended = (
+        ProductRecommendation.objects.filter(product_id=product_id)
+        .values_list("recommended", flat=True)
+        .first()
+    ) or []
+
+    recommendations = [
+        {"product_id": other_id, "score": score}
+        for other_id, score in recommended
+    ]
+
+    if request.query_params.get('expand', '').lower() == 'true' and recommendations:
+        products = Product.objects.filter(
+            id__in=[r["product_id"] for r in recommendations], is_active=True
+        ).only("id", "name", "price", "image_url").in_bulk()
+        recommendations = [
+            {
+                **r,
+                "name": products[r["product_id"]].name,
+                "price": str(products[r["product_id"]].price),
+                "image_url": products[r["product_id"]].image_url
+            }
+            for r in recommendations if r["product_id"] in products
+        ]
+
+    return Response({
+        "product_id": product_id,
+        "recommendations": recommendations
+    })
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([HasServiceToken])
+def reserve_products(request):
+    """
+    Reserve every line of an order in one call, all-or-nothing.
+
+    Body: {"reservation_id": "...", "items": [{"product_id": 1, "quantity": 2}, ...]}.
+    Returns the reserved products with the name and price to snapshot into
+    the order. Retrying with the same reservation_id reserves nothing new.
+    """
+    serializer = ReservationRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    quantities = {}
+    for item in serializer.validated_data["items"]:
+        quantities[item["product_id"]] = quantities.get(item["product_id"], 0) + item["quantity"]
+
+    products, unavailable = reservations.reserve(
+        serializer.validated_data["reservation_id"], quantities
+    )
+    if unavailable:
+        return Response({
+            "success": False,
+            "message": "Insufficient stock for some products",
+            "unavailable": unavailable
+        }, status.HTTP_409_CONFLICT)
+
+    return Response({
+        "success": True,
+        "items": [
+            {
+                "product_id": product.id,
+                "name": product.name,
+                "price": str(product.price),
+                "quantity": quantities.get(product.id, 0),
+                "remaining_stock": product.stock_quantity
+            }
+            for product in products
+        ]
+    })
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([HasServiceToken])
+def release_products(request):
+    """
+    Return the stock of a reservation whose order failed, once.
+
+    Body: {"reservation_id": "..."}. Releasing an id that was never
+    reserved is recorded, so a late reservation with it is refused.
+    """
+    serializer = ReservationIdSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    products = reservations.release(serializer.validated_data["reservation_id"])
+    return Response({
+        "success": True,
+        "items": [
+            {"product_id": product.id, "current_stock": product.stock_quantity}
+            for product in products
+        ]
+    })
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([HasServiceToken])
+def confirm_reservation(request):
+    """
+    Keep the stock of a reservation whose order was placed.
+
+    Body: {"reservation_id": "..."}. Holds that are never confirmed are
+    given back by release_expired_reservations after PRODUCT_RESERVATION_TTL.
+    """
+    serializer = ReservationIdSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    if not reservations.confirm(serializer.validated_data["reservation_id"]):
+        return Response({
+            "success": False,
+            "message": "Reservation is unknown or was already released"
+        }, status.HTTP_409_CONFLICT)
+    return Response({"success": True})
+
+
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def import_products(request):
+    """
+    Bulk upsert products by SKU from a CSV or NDJSON request body.
+    Staff only.
+
+    The body is read line by line from the request stream, so uploads
+    of any size are imported in constant memory.
+    """
+    content_type = request.content_type.split(";")[0].strip().lower()
+    file_format = IMPORT_CONTENT_TYPES.get(content_type)
+    if file_format is None:
+        return Response({
+            "success": False,
+            "message": "Content-Type must be text/csv or application/x-ndjson"
+        }, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    stream = request.stream
+    lines = (
+        line.decode("utf-8-sig") for line in stream
+    ) if stream is not None else iter(())
+
+    result = ProductImporter().run(READERS[file_format](lines))
+    return Response({
+        "success": result.failed == 0,
+        **result.as_dict()
+    })
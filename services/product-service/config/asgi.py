@@ -1,5 +1,5 @@
 """
-ASGI config for confing project.
+ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
@@ -11,6 +11,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'confing.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# Build the autocomplete index before the first request hits the worker
+from apps.products.autocomplete import warm_up  # noqa: E402
+
+warm_up()
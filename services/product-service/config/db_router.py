@@ -0,0 +1,60 @@
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# True while reads of the current context must go to the primary. Only
+# ReplicaRoutingMiddleware unpins, for the span of one safe request:
+# commands, event handlers and other background work always read the
+# primary, so a write there can't pin or unpin anything that runs later.
+_pinned = contextvars.ContextVar("db_pinned_to_primary", default=True)
+# True once the current request has written anything.
+_wrote = contextvars.ContextVar("db_wrote", default=False)
+
+
+def pin_to_primary(pinned=True):
+    """
+    Start a unit of work with fresh routing state: reads pinned or not,
+    nothing written yet. Returns a token for unpin().
+    """
+    return _pinned.set(pinned), _wrote.set(False)
+
+
+def unpin(tokens):
+    pinned_token, wrote_token = tokens
+    _pinned.reset(pinned_token)
+    _wrote.reset(wrote_token)
+
+
+def has_written():
+    return _wrote.get()
+
+
+class PrimaryReplicaRouter:
+    """
+    Send the reads of unpinned requests to a random replica from
+    DATABASE_REPLICAS, everything else to the primary. Reads stay on the
+    primary inside a transaction and after the request has written, so
+    callers always read their writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or _pinned.get():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary; other aliases belong to other services.
+        return db == DEFAULT_DB_ALIAS
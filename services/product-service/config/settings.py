@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -35,7 +36,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    "apps.products.middleware.JWTAuthenticationMiddleware"
+    "apps.products.middleware.JWTAuthenticationMiddleware",
+    "apps.products.middleware.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -68,9 +70,23 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR.parent.parent / 'databases' / 'product.db',
-    }
+    },
 }
 
+# Read replicas of the product database, e.g. PRODUCT_DB_REPLICAS=/tmp/r1.db,/tmp/r2.db
+# Locally they are plain SQLite copies refreshed with `manage.py sync_replicas`.
+DATABASE_REPLICAS = []
+for index, path in enumerate(filter(None, os.environ.get('PRODUCT_DB_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica_{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['config.db_router.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = 5  # keep a client on the primary this long after it writes
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -160,4 +176,47 @@ LOGGING = {
 # Redis
 REDIS_HOST = "localhost"
 REDIS_PORT = 6379
-REDIS_DB = 0
\ No newline at end of file
+REDIS_DB = 0
+
+# Catalog facets
+PRODUCT_FACET_PRICE_BUCKETS = [0, 50, 100, 250, 500, 1000]
+PRODUCT_FACETS_CACHE_TIMEOUT = 60  # seconds, 0 disables caching
+
+# Bulk catalog import
+PRODUCT_IMPORT_CHUNK_SIZE = 1000
+
+# Streaming catalog export
+PRODUCT_EXPORT_CHUNK_SIZE = 2000
+
+# Product change feed
+PRODUCT_CHANGES_PAGE_SIZE = 500
+PRODUCT_CHANGES_MAX_PAGE_SIZE = 5000
+
+# Event bus and transactional outbox
+EVENT_BUS_BACKEND = "apps.products.events.RedisEventBus"
+PRODUCT_OUTBOX_BATCH_SIZE = 500
+PRODUCT_OUTBOX_INTERVAL = 1.0  # seconds between relay polls
+PRODUCT_OUTBOX_RETENTION_DAYS = 7
+
+# Batch availability checks
+PRODUCT_AVAILABILITY_MAX_ITEMS = 500
+PRODUCT_AVAILABILITY_CACHE_TTL = 0.5  # seconds, 0 disables the micro-cache
+PRODUCT_AVAILABILITY_CACHE_MAX_ENTRIES = 10000
+
+# Order reservations; SERVICE_TOKEN is the shared secret order-service sends as X-Service-Token
+SERVICE_TOKEN = os.environ.get('SERVICE_TOKEN', 'dev-service-token')
+PRODUCT_RESERVATION_TTL = 30 * 60  # seconds a hold waits for its order before it is reclaimed
+
+# Autocomplete prefix index
+PRODUCT_AUTOCOMPLETE_LIMIT = 10
+PRODUCT_AUTOCOMPLETE_MAX_LIMIT = 50
+PRODUCT_AUTOCOMPLETE_MAX_PRODUCTS = 200000
+PRODUCT_AUTOCOMPLETE_SCAN_LIMIT = 2000  # matching keys ranked per lookup
+PRODUCT_AUTOCOMPLETE_REBUILD_INTERVAL = 300  # seconds
+
+# "Frequently bought together" recommendations
+PRODUCT_RECOMMENDATIONS_TOP_N = 10
+PRODUCT_RECOMMENDATIONS_CHUNK_SIZE = 5000  # baskets per batch
+
+# Category registry
+CATEGORY_REGISTRY_CHECK_INTERVAL = 1.0  # seconds between generation checks
@@ -1,5 +1,5 @@
 """
-WSGI config for confing project.
+WSGI config for config project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'confing.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Build the autocomplete index before the first request hits the worker
+from apps.products.autocomplete import warm_up  # noqa: E402
+
+warm_up()
@@ -1,3 +1,29 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from .models import User
+
+
+@override_settings(SERVICE_TOKEN="secret")
+class UsersBatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="ann@example.com", username="ann", password="password123",
+            first_name="Ann", last_name="Lee"
+        )
+
+    def test_batch_returns_contacts_and_missing_ids(self):
+        response = self.client.post(
+            "/api/users/batch/", {"ids": [self.user.id, 999]},
+            content_type="application/json", HTTP_X_SERVICE_TOKEN="secret"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["users"][0]["email"], "ann@example.com")
+        self.assertEqual(response.json()["missing"], [999])
+
+    def test_batch_requires_service_token(self):
+        response = self.client.post(
+            "/api/users/batch/", {"ids": [self.user.id]},
+            content_type="application/json", HTTP_X_SERVICE_TOKEN="wrong"
+        )
+        self.assertEqual(response.status_code, 403)
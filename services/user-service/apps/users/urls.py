@@ -5,5 +5,6 @@ from . import views
 urlpatterns = [
     path("register/", views.RegisterView.as_view(), name="register"),
     path("profile/", views.ProfileView.as_view(), name="profile"),
+    path("batch/", views.users_batch, name="users-batch"),
     path("profile/update/", views.ProfileUpdateView.as_view(), name="profile-update"),
 ]
\ No newline at end of file
@@ -1,12 +1,20 @@
+import hmac
+
+from django.conf import settings
 from django.shortcuts import render
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import (
+    api_view, authentication_classes, permission_classes
+)
+from rest_framework.permissions import BasePermission, IsAuthenticated
 from .models import User, UserProfile
 from .serializers import (
     UserWithProfileSerializer, 
     UserProfileSerializer,
-    UserRegistrarionSerializer
+    UserRegistrarionSerializer,
+    UserBatchRequestSerializer,
+    UserContactSerializer
 )
 
 
@@ -17,7 +25,7 @@ class RegisterView(generics.CreateAPIView):
 
 
 class ProfileView(generics.RetrieveUpdateAPIView):
-    serializer_class = UserProfileSerializer
+    serializer_class = UserWithProfileSerializer
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
@@ -33,4 +41,33 @@ class ProfileUpdateView(generics.UpdateAPIView):
 
     def get_object(self):
         profile, created = UserProfile.objects.get_or_create(user=self.request.user)
-        return profile
\ No newline at end of file
+        return profile
+
+
+class HasServiceToken(BasePermission):
+    """Calls from other services, identified by the shared X-Service-Token."""
+
+    def has_permission(self, request, view):
+        token = request.headers.get("X-Service-Token", "")
+        return bool(settings.SERVICE_TOKEN) and \
+            hmac.compare_digest(token, settings.SERVICE_TOKEN)
+
+
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([HasServiceToken])
+def users_batch(request):
+    """Contact details of up to USERS_BATCH_MAX_IDS users in one call."""
+    serializer = UserBatchRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    ids = set(serializer.validated_data["ids"])
+    users = User.objects.filter(id__in=ids).only(
+        "id", "email", "first_name", "last_name"
+    )
+    data = UserContactSerializer(users, many=True).data
+    return Response({
+        "users": data,
+        "missing": sorted(ids - {user["id"] for user in data}),
+    })
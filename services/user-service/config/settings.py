@@ -1,4 +1,5 @@
 from pathlib import Path
+import os
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -158,4 +159,9 @@ LOGGING = {
         },
     },  
     "root": {"level": "INFO", "handlers": ["console"]},
-}
\ No newline at end of file
+}
+
+
+# Shared secret other services send as X-Service-Token for internal endpoints
+SERVICE_TOKEN = os.environ.get('SERVICE_TOKEN', 'dev-service-token')
+USERS_BATCH_MAX_IDS = 500